@@ -0,0 +1,236 @@
+# Headless benchmark for the dashboard's data path: generates synthetic CSV exports at a multiple of
+# the sample month and times the same code the pages run (CSV load, preprocessing and validation,
+# on-disk cache, rollups, filtering, KPIs, figures, customer analytics) without a browser or Streamlit server.
+#
+#   python benchmark.py --scale 10 100 1000 --output results.json
+#   python benchmark.py --scale 100 --compare results.json
+#
+# Each stage reports wall time (best of --repeat runs), peak memory allocated during the stage
+# (traced in a separate run, so tracing does not inflate the times) and the size of its output.
+# Data comes from a fixed seed and stage names are stable, so result files from different commits
+# can be compared with --compare.
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import charts
+from gamevault import customers, kpis, loading, rollups
+
+SAMPLE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- 1. Synthetic Data ---
+# Rows are resampled from the sample exports, so every column keeps its real spellings (durations,
+# start times, games, snacks), then given new dates and customers. At scale S each source gets S times
+# the sample's rows, spread over min(S, MAX_MONTHS) months; past that, days just get busier.
+# Customers grow with the data (S times the sample's), and expenses repeat once a month.
+MAX_MONTHS = 60
+
+def generate_source(sample, source, scale, months, customer_count, rng):
+    fmt = loading.DATE_FORMATS[source]
+    sample_dates = loading.parse_dates(sample['Date'], fmt)
+    if source == 'expenses':
+        # Monthly bills: the sample month's expenses, once per month
+        rows = pd.concat([sample] * months, ignore_index=True)
+        dates = [date + pd.DateOffset(months=month) for month in range(months) for date in sample_dates]
+        rows['Date'] = pd.DatetimeIndex(dates).strftime(fmt)
+        return rows
+
+    start = sample_dates.min()
+    days = pd.date_range(start, start + pd.DateOffset(months=months), freq='D', inclusive='left')
+    rows = sample.iloc[rng.integers(0, len(sample), round(len(sample) * scale))].reset_index(drop=True)
+    # Logs are written in date order; each distinct day is formatted once
+    day_codes = np.sort(rng.integers(0, len(days), len(rows)))
+    rows['Date'] = days.strftime(fmt).to_numpy()[day_codes]
+
+    if 'CustomerID' in rows:
+        customer_ids = rng.integers(1, customer_count + 1, len(rows))
+        rows['CustomerID'] = customer_ids
+        if 'Name' in rows:
+            # A customer keeps one name across sources: names are reused from the sample by ID
+            names = sample['Name'].dropna().drop_duplicates().to_numpy()
+            rows['Name'] = names[customer_ids % len(names)]
+    return rows
+
+def generate_data(directory, scale, months, seed):
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    samples = {source: pd.read_csv(os.path.join(SAMPLE_DIR, file_name)) for source, file_name in loading.SOURCE_FILES.items()}
+    customer_count = round(samples['visits']['CustomerID'].nunique() * scale)
+    row_counts = {}
+    for source, sample in samples.items():
+        rows = generate_source(sample, source, scale, months, customer_count, rng)
+        rows.to_csv(os.path.join(directory, loading.SOURCE_FILES[source]), index=False)
+        row_counts[source] = len(rows)
+    return row_counts
+
+
+# --- 2. Measurement ---
+def output_bytes(result):
+    # Size of a stage's output: in-memory bytes for frames, serialized bytes for figures
+    if isinstance(result, pd.DataFrame):
+        return int(result.memory_usage(deep=True).sum())
+    if isinstance(result, pd.Series):
+        return int(result.memory_usage(deep=True))
+    if isinstance(result, tuple):
+        return sum(output_bytes(item) for item in result)
+    if isinstance(result, dict):
+        if 'data' in result and 'layout' in result:
+            return len(charts.pio.to_json(result, validate=False))
+        return sum(output_bytes(item) for item in result.values())
+    if isinstance(result, str):
+        return len(result.encode())
+    return 0
+
+def measure(stage, function, repeat):
+    seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - started)
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, {'stage': stage, 'seconds': round(min(seconds), 6), 'peak_mb': round(peak / 1e6, 3),
+                    'output_bytes': output_bytes(result)}
+
+
+# --- 3. Stages ---
+# The same calls the data backend and cached KPI/figure helpers make (see gamevault, charts.py and
+# common.py), run directly so that Streamlit's caches do not hide the work.
+FIGURE_OPTIONS = {
+    'top_customers': {'exact': False},
+    'revenue_trend': {'resolution': 'Daily', 'style': 'Lines', 'streams': tuple(rollups.REVENUE_STREAMS.values())},
+}
+
+def filter_scenarios(rollup_frames):
+    first, last = rollup_frames['daily']['Date'].min(), rollup_frames['daily']['Date'].max()
+    busiest_game = rollup_frames['gameplay'].groupby('Game Played', observed=True)['Visits'].sum().idxmax()
+    return {
+        'all dates': (first, last, 'All Games'),
+        'last 30 days': (last - pd.Timedelta(days=29), last, 'All Games'),
+        'one game': (first, last, busiest_game),
+    }
+
+def run_stages(repeat):
+    results = []
+    def stage(name, function):
+        result, row = measure(name, function, repeat)
+        results.append(row)
+        return result
+
+    frames = {}
+    for source in loading.SOURCE_FILES:
+        raw = stage(f"read_csv: {source}", lambda: loading.read_source_csv(source))
+        # Validation on its own (it also runs inside preprocess, which includes it)
+        parsed = loading.apply_schema(loading.PREPROCESSORS[source](raw), source)
+        stage(f"validate: {source}", lambda: loading.validate_rows(source, raw, parsed))
+        frames[source] = stage(f"preprocess: {source}", lambda: loading.preprocess_rows(source, raw)[0])
+    if loading.feather is not None:
+        def write_cache():
+            for source, df in frames.items():
+                loading.write_cached_frame(source, df)
+
+        def read_cache():
+            return tuple(loading.feather.read_table(os.path.join(loading.CACHE_DIR, f"{source}.feather"),
+                                                   memory_map=True).to_pandas() for source in frames)
+        stage("cache write", write_cache)
+        stage("cache read", read_cache)
+
+    rollup_frames = stage("rollups", lambda: rollups.build_daily_rollups(frames))
+    indexes = stage("rollup index", lambda: rollups.index_rollups(rollup_frames))
+    for scenario, (start, end, game) in filter_scenarios(rollup_frames).items():
+        filtered = stage(f"filter: {scenario}", lambda: rollups.filter_rollups(rollup_frames, indexes, start, end, game))
+        stage(f"kpis: {scenario}", lambda: {kpi: compute(filtered) for kpi, (_, compute) in kpis.KPIS.items()})
+        for chart, build in charts.FIGURES.items():
+            stage(f"figure: {chart} ({scenario})", lambda: build(filtered, **FIGURE_OPTIONS.get(chart, {})).to_dict())
+
+    activity = stage("customer activity", lambda: customers.build_customer_activity(
+        frames['visits'], frames['snacks'], frames['tournaments']))
+    stage("customer analytics", lambda: customers.analyse_customers(*activity))
+    return results
+
+
+# --- 4. Reporting ---
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SAMPLE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(scale, rows, baseline=None):
+    table = pd.DataFrame(rows).set_index('stage')
+    table['ms'] = (table['seconds'] * 1000).round(2)
+    table['output_kb'] = (table['output_bytes'] / 1024).round(1)
+    columns = ['ms', 'peak_mb', 'output_kb']
+    if baseline is not None:
+        table['vs_baseline'] = (table['seconds'] / baseline.reindex(table.index)).round(2)
+        columns.append('vs_baseline')
+    print(f"\n== scale {scale}x: {table['seconds'].sum():.2f} s in total")
+    print(table[columns].to_string())
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data path on synthetic data.")
+    parser.add_argument('--scale', type=float, nargs='+', default=[10],
+                        help="multiples of the sample month's rows to generate (default: 10)")
+    parser.add_argument('--months', type=int, help=f"months of data to spread the rows over (default: scale, at most {MAX_MONTHS})")
+    parser.add_argument('--seed', type=int, default=2027)
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per stage; the fastest is reported")
+    parser.add_argument('--data-dir', help="where to write the synthetic CSVs (default: a temporary directory, removed afterwards)")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="a results file from an earlier run; times are shown relative to it")
+    args = parser.parse_args()
+
+    baselines = {}
+    if args.compare:
+        with open(args.compare) as f:
+            for run in json.load(f)['runs']:
+                baselines[run['scale']] = pd.DataFrame(run['stages']).set_index('stage')['seconds']
+
+    report = {
+        'commit': git_commit(),
+        'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'runs': [],
+    }
+    cwd = os.getcwd()
+    for scale in args.scale:
+        months = args.months or max(1, min(round(scale), MAX_MONTHS))
+        directory = os.path.join(args.data_dir, f"scale_{scale:g}") if args.data_dir else tempfile.mkdtemp(prefix='gamevault_bench_')
+        try:
+            started = time.perf_counter()
+            row_counts = generate_data(directory, scale, months, args.seed)
+            print(f"Generated {sum(row_counts.values()):,} rows over {months} months in {time.perf_counter() - started:.1f} s "
+                  f"({directory})", file=sys.stderr)
+            # gamevault reads the CSVs and writes its cache relative to the working directory
+            os.chdir(directory)
+            rows = run_stages(args.repeat)
+        finally:
+            os.chdir(cwd)
+            if not args.data_dir:
+                shutil.rmtree(directory, ignore_errors=True)
+        report['runs'].append({'scale': scale, 'months': months, 'rows': row_counts, 'stages': rows})
+        print_results(scale, rows, baselines.get(scale))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# Plotly figures for the dashboard: the chart theme and one builder per chart. Imported on the first
+# chart a server process builds (see common.load_charts()), not at startup.
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from gamevault.rollups import (age_counts_by_year, build_revenue_series, expense_totals, expenses_by_day,
+                               game_play_counts, rating_counts_by_score, snack_quantities_by_type,
+                               snack_sales_by_type, top_customer_spend_with_bound, tournament_entries_by_game,
+                               utilisation_by_weekday)
+
+
+# --- 2b. Plotly Theme ---
+# One registered template carries the dark styling every chart used to repeat in its own
+# update_layout() call. It is lean on purpose: it replaces Plotly's default template instead of
+# extending it, so each serialized figure ships only these few settings.
+AXIS_STYLE = dict(color='#FFFFFF', gridcolor='#3A3A3A', zerolinecolor='#3A3A3A', automargin=True,
+                  title=dict(font=dict(size=18)), tickfont=dict(size=14))
+
+pio.templates['gamevault_dark'] = go.layout.Template(layout=dict(
+    plot_bgcolor='#1F1F1F', paper_bgcolor='#1F1F1F', # Match KPI card background
+    font=dict(color='#FFFFFF', size=12), # All text white
+    title=dict(font=dict(color='#FFFFFF')),
+    legend=dict(font=dict(color='#FFFFFF')),
+    xaxis=AXIS_STYLE,
+    yaxis=AXIS_STYLE,
+    annotationdefaults=dict(showarrow=False, font=dict(size=16, color='#E0E0E0')),
+    height=380, # Fixed height to control scrolling
+))
+pio.templates.default = 'gamevault_dark'
+
+def make_chart(plot, data, layout=None, **kwargs):
+    # Every chart goes through here: plot is a plotly.express function, layout holds the few per-chart overrides
+    fig = plot(data, **kwargs)
+    if layout:
+        fig.update_layout(**layout)
+    return fig
+
+def empty_chart(title, message):
+    # Placeholder shown when a filter leaves a chart without data. Figures are cached and drawn as
+    # dicts, which st.plotly_chart rejects without a trace, so it carries one empty trace and hides
+    # the axes that trace would bring.
+    fig = go.Figure(go.Scatter(x=[], y=[], showlegend=False))
+    fig.add_annotation(x=0.5, y=0.5, xref='paper', yref='paper', text=message)
+    fig.update_layout(title_text=title, xaxis_visible=False, yaxis_visible=False)
+    return fig
+
+
+# --- 5b. Figure Builders ---
+# Each figure is a pure function of its aggregated input; common.cached_figure() memoizes the result.
+def popular_games_figure(game_counts):
+    return make_chart(
+        px.bar,
+        game_counts.sort_values(ascending=False).reset_index(name='Count'),
+        x='Game Played',
+        y='Count',
+        title='Most Played Games',
+        labels={'Game Played': 'Game Played', 'Count': 'Number of Plays'},
+        color_discrete_sequence=px.colors.sequential.Plasma_r, # Muted, dark-friendly sequential palette
+    )
+
+def top_customers_figure(top_customers, error_bound=0):
+    if top_customers.empty:
+        return empty_chart("Top Customers by Spending", "No customer data available.")
+    # Totals from the per-day sketches are marked approximate, like the unique customer count
+    title = 'Top Customers by Spending'
+    if error_bound:
+        title += f' (≈, each up to P{error_bound:,.0f} low)'
+    return make_chart(
+        px.bar,
+        top_customers,
+        layout=dict(yaxis_autorange="reversed"),
+        x='Amount Paid (P)',
+        y='Customer Name',
+        orientation='h',
+        title=title,
+        labels={'Amount Paid (P)': 'Total Amount Paid (P)', 'Customer Name': 'Customer Name'},
+        color_discrete_sequence=px.colors.sequential.Aggrnyl, # Another dark-friendly sequential palette
+    )
+
+def expenses_figure(expense_totals):
+    return make_chart(
+        px.pie,
+        expense_totals,
+        layout=dict(legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)), # Move legend to top for space
+        names='Expense Category',
+        values='Amount (P)',
+        title='Expenses by Category',
+        hole=0.4, # Modern donut chart look
+        color_discrete_sequence=px.colors.qualitative.D3, # D3 is generally dark-friendly and distinct
+    )
+
+def snack_popularity_figure(snack_quantities):
+    if snack_quantities.empty:
+        return empty_chart("Snack Popularity", "No snack sales data available.")
+    return make_chart(
+        px.bar,
+        snack_quantities.reset_index(),
+        x='Snack',
+        y='Quantity',
+        title='Snack Popularity',
+        labels={'Quantity': 'Quantity Sold', 'Snack': 'Snack Type'},
+        color_discrete_sequence=px.colors.sequential.OrRd, # Another appealing sequential palette
+    )
+
+def revenue_trend_figure(revenue_series, resolution, style):
+    if revenue_series.columns.empty:
+        return empty_chart(f'{resolution} Revenue Trend', "Select at least one revenue stream.")
+    revenue_long = revenue_series.reset_index().melt(id_vars='Date', var_name='Stream', value_name='Amount (P)')
+    return make_chart(
+        px.area if style == 'Stacked' else px.line,
+        revenue_long,
+        x='Date',
+        y='Amount (P)',
+        color='Stream',
+        title=f'{resolution} Revenue Trend',
+        line_shape='linear',
+        color_discrete_sequence=px.colors.qualitative.Pastel,
+    )
+
+def rating_figure(rating_counts):
+    if rating_counts.empty:
+        return empty_chart("Customer Rating Distribution", "No rating data available.")
+    return make_chart(
+        px.bar,
+        rating_counts,
+        layout=dict(xaxis_title="Rating (1-5)", yaxis_title="Count"),
+        x='Rating (1-5)',
+        y='Count',
+        title='Customer Rating Distribution',
+        labels={'Rating (1-5)': 'Rating (1-5)', 'Count': 'Number of Ratings'},
+        color_discrete_sequence=['#F08080'],
+    )
+
+def age_figure(age_counts):
+    return make_chart(
+        px.histogram,
+        age_counts,
+        layout=dict(xaxis_title="Age", yaxis_title="Count"),
+        x='Age',
+        y='Visits',
+        histfunc='sum',
+        nbins=10,
+        title='Age Distribution',
+        labels={'Age': 'Age', 'count': 'Number of Customers'},
+        color_discrete_sequence=['#9370DB'],
+    )
+
+def utilisation_figure(utilisation):
+    if utilisation.empty:
+        return empty_chart("Station Utilisation", "No timed visits in this range.")
+    return make_chart(
+        px.imshow,
+        utilisation,
+        layout=dict(xaxis_title="Time of Day", yaxis_title="Day of Week"),
+        title='Average Occupied Stations per 15 Minutes',
+        labels={'x': 'Time of Day', 'y': 'Day of Week', 'color': 'Stations'},
+        color_continuous_scale='Inferno',
+        aspect='auto',
+    )
+
+def snack_revenue_figure(snack_sales):
+    if snack_sales.empty:
+        return empty_chart("Snack Revenue", "No snack sales data available.")
+    return make_chart(
+        px.bar,
+        snack_sales,
+        x='Snack',
+        y='Amount',
+        title='Snack Revenue',
+        labels={'Amount': 'Revenue (P)', 'Snack': 'Snack Type'},
+        color_discrete_sequence=px.colors.sequential.OrRd[::-1],
+    )
+
+def tournament_games_figure(entries):
+    if entries.empty:
+        return empty_chart("Tournament Entries by Game", "No tournament data available.")
+    return make_chart(
+        px.bar,
+        entries,
+        x='Game Played',
+        y='Entries',
+        title='Tournament Entries by Game',
+        hover_data={'Amount': ':,.2f'},
+        labels={'Game Played': 'Game', 'Entries': 'Entries', 'Amount': 'Entry Fees (P)'},
+        color_discrete_sequence=px.colors.sequential.Plasma_r,
+    )
+
+def expense_timeline_figure(expenses):
+    if expenses.empty:
+        return empty_chart("Expenses over Time", "No expense data available.")
+    return make_chart(
+        px.bar,
+        expenses,
+        x='Date',
+        y='Amount (P)',
+        color='Expense Category',
+        title='Expenses over Time',
+        color_discrete_sequence=px.colors.qualitative.D3,
+    )
+
+# Chart name -> builder taking the filtered rollups (plus any chart-specific options)
+FIGURES = {
+    'popular_games': lambda filtered: popular_games_figure(game_play_counts(filtered)),
+    'top_customers': lambda filtered, exact: top_customers_figure(*top_customer_spend_with_bound(filtered, exact=exact)),
+    'expenses': lambda filtered: expenses_figure(expense_totals(filtered)),
+    'snack_popularity': lambda filtered: snack_popularity_figure(snack_quantities_by_type(filtered)),
+    'revenue_trend': lambda filtered, resolution, style, streams: revenue_trend_figure(
+        build_revenue_series(filtered['daily'], resolution)[list(streams)], resolution, style
+    ),
+    'ratings': lambda filtered: rating_figure(rating_counts_by_score(filtered)),
+    'ages': lambda filtered: age_figure(age_counts_by_year(filtered)),
+    'utilisation': lambda filtered: utilisation_figure(utilisation_by_weekday(filtered)),
+    'snack_revenue': lambda filtered: snack_revenue_figure(snack_sales_by_type(filtered)),
+    'tournament_games': lambda filtered: tournament_games_figure(tournament_entries_by_game(filtered)),
+    'expense_timeline': lambda filtered: expense_timeline_figure(expenses_by_day(filtered)),
+}
+
+def cohort_figure(matrix, title, text_format):
+    return make_chart(
+        px.imshow,
+        matrix,
+        layout=dict(xaxis_title="Months Since First Visit", yaxis_title="Cohort", xaxis_dtick=1),
+        title=title,
+        text_auto=text_format,
+        color_continuous_scale='Viridis',
+        aspect='auto',
+    )
+
+CUSTOMER_FIGURES = {
+    'retention': lambda analytics: cohort_figure(analytics['retention'], 'Monthly Cohort Retention', '.0%'),
+    'cohort_ltv': lambda analytics: cohort_figure(analytics['cohort_ltv'], 'Cumulative Value per Customer (P)', ',.0f'),
+}
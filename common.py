@@ -0,0 +1,331 @@
+# Streamlit layer shared by the dashboard pages (Dashboard.py and views/): chart theme, the shared
+# data backend, KPI cards, cached KPIs and figures, page fragments and the profiling panel. The
+# computation itself lives in the gamevault package, which does not import Streamlit. Imported once
+# per server process, so nothing here runs on a rerun except what a page calls.
+import streamlit as st
+import pandas as pd
+from collections import deque
+from datetime import datetime
+import base64
+import functools
+import json
+import os
+import time
+
+from gamevault.backends import open_backend
+from gamevault.customers import analyse_customers
+from gamevault.kpis import KPIS
+from gamevault.loading import quality_report, quarantine_reasons
+from gamevault.profiling import active_profile, count_cache, profile_stage, start_profile, stop_profile
+from gamevault.snapshots import SnapshotStore
+
+
+# --- 2a. Profiling Hooks ---
+# The Streamlit side of gamevault.profiling: cache counters around st.cache_data and chart payload sizes.
+def record_payload(chart, figure):
+    # Bytes of figure JSON sent to the browser; only measured on profiled reruns
+    run = active_profile()
+    if run is not None:
+        run['payloads'][chart] = len(load_charts().pio.to_json(figure, validate=False))
+
+def profiled_cache_data(name, **cache_options):
+    # st.cache_data that also counts its lookups and misses: the wrapped body only runs on a miss
+    def decorator(function):
+        @functools.wraps(function)
+        def compute(*args, **kwargs):
+            count_cache(name, 'misses')
+            return function(*args, **kwargs)
+        cached = st.cache_data(**cache_options)(compute)
+
+        @functools.wraps(function)
+        def lookup(*args, **kwargs):
+            count_cache(name, 'lookups')
+            return cached(*args, **kwargs)
+        lookup.clear = cached.clear
+        return lookup
+    return decorator
+
+
+# --- 2b. Static Assets ---
+# Resolved next to the app rather than the working directory, and read once per server process
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+STYLESHEET_PATH = os.path.join(APP_DIR, "style.css")
+LOGO_PATH = os.path.join(APP_DIR, "images", "logo.png")
+
+@st.cache_resource
+def stylesheet():
+    with open(STYLESHEET_PATH) as f:
+        return f"<style>\n{f.read()}</style>"
+
+@st.cache_resource
+def logo_base64():
+    # None when the logo is missing; the header then shows a plain title
+    try:
+        with open(LOGO_PATH, "rb") as f:
+            return base64.b64encode(f.read()).decode()
+    except FileNotFoundError:
+        return None
+
+
+# --- 4f. Data Backend ---
+# One backend per server process (GAMEVAULT_BACKEND, see gamevault.backends), shared by every
+# session, so nothing is copied per rerun
+@st.cache_resource
+def data_backend():
+    return open_backend()
+
+# Default auto-refresh interval for the live-updates toggle; 0 leaves live updates off by default
+LIVE_REFRESH_SECONDS = int(os.environ.get('GAMEVAULT_REFRESH_SECONDS', '0'))
+
+# --- 5. KPIs ---
+# Each page computes only the KPIs it shows (see gamevault.kpis), from the rollups it asked for.
+def untimed_visits_caption(untimed_visits):
+    if untimed_visits:
+        st.caption(f"⚠️ {untimed_visits:,} visit(s) in this range have a missing or unreadable Duration "
+                   "and are left out of the average visit duration.")
+
+def kpi_card(column, label, value, icon, css_class=""):
+    with column:
+        st.markdown(f"""
+            <div class="stMetric {css_class}">
+                <div><span class="icon">{icon}</span> {label}</div>
+                <div>{value}</div>
+            </div>
+        """, unsafe_allow_html=True)
+
+
+KPI_CACHE_ENTRIES = 256
+
+# Snapshots precomputed by the report CLI, read in place of a live computation while they match the data
+@st.cache_resource
+def report_snapshots():
+    return SnapshotStore()
+
+@profiled_cache_data('kpis', max_entries=KPI_CACHE_ENTRIES, show_spinner=False)
+def cached_kpi(kpi, data_version, start, end, game='All Games', **options):
+    with profile_stage("snapshot lookup"):
+        snapshot = report_snapshots().kpi(kpi, start, end, game, **options)
+    if snapshot is not None:
+        return snapshot
+    names, compute = KPIS[kpi]
+    filtered = data_backend().filtered_rollups(start, end, game, names)
+    with profile_stage(f"kpi: {kpi}"):
+        return compute(filtered, **options)
+
+def page_kpi(kpi, scope, **options):
+    # scope holds only the filters the calling fragment declared (see page_fragment()); a fragment
+    # that does not depend on the game filter shares cache entries across games
+    return cached_kpi(kpi, scope['version'], scope['start'], scope['end'], scope.get('game', 'All Games'), **options)
+
+# The sidebar in Dashboard.py publishes the active filters here for the page scripts
+def current_filters():
+    return st.session_state['filters']
+
+
+# --- 5b. Cached Figures ---
+# The figure builders live in charts.py. cached_figure() memoizes the finished figure per chart and
+# filter state, listing only the filters a chart actually depends on, so moving back and forth
+# between filter values (or changing an unrelated widget) skips the aggregation and Plotly Express
+# work entirely. charts.py (and Plotly Express with it) is imported on the first cache miss, so
+# startup and reruns served from the cache never pay for it.
+@functools.cache
+def load_charts():
+    with profile_stage("import: charts"):
+        import charts
+    return charts
+
+# Rollups each chart reads; only these are built and filtered when a chart is drawn
+FIGURE_ROLLUPS = {
+    'popular_games': ['gameplay'],
+    'top_customers': ['customers', 'top_customers', 'customer_sketch'],
+    'expenses': ['expenses'],
+    'snack_popularity': ['snacks'],
+    'revenue_trend': ['daily'],
+    'ratings': ['ratings'],
+    'ages': ['ages'],
+    'utilisation': ['occupancy', 'gameplay'],
+    'snack_revenue': ['snacks'],
+    'tournament_games': ['tournaments'],
+    'expense_timeline': ['expenses'],
+}
+
+# Finished figures kept per process; past this, the least recently used entries are evicted
+FIGURE_CACHE_ENTRIES = 128
+
+@profiled_cache_data('figures', max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def cached_figure(chart, data_version, start, end, game='All Games', **options):
+    filtered = data_backend().filtered_rollups(start, end, game, FIGURE_ROLLUPS[chart])
+    with profile_stage(f"figure: {chart}"):
+        figure = load_charts().FIGURES[chart](filtered, **options)
+    with profile_stage(f"serialize: {chart}"):
+        return figure.to_dict()
+
+def draw_figure(chart, figure):
+    record_payload(chart, figure)
+    with profile_stage(f"draw: {chart}"):
+        st.plotly_chart(figure, use_container_width=True)
+
+def render_figure(chart, scope, **options):
+    # Like page_kpi(), the game only becomes part of the cache key when the fragment depends on it
+    figure = cached_figure(chart, scope['version'], scope['start'], scope['end'], scope.get('game', 'All Games'), **options)
+    draw_figure(chart, figure)
+
+# Customer analytics ignore the sidebar filters, so they are cached on the data version alone:
+# one computation per data refresh, shared by every session and rerun
+@profiled_cache_data('customer analytics', max_entries=2, show_spinner=False)
+def customer_analytics(data_version):
+    with profile_stage("customer activity"):
+        activity = data_backend().customer_activity()
+    with profile_stage("customer analytics"):
+        return analyse_customers(*activity)
+
+
+@profiled_cache_data('figures', max_entries=8, show_spinner=False)
+def cached_customer_figure(chart, data_version):
+    analytics = customer_analytics(data_version)
+    with profile_stage(f"figure: {chart}"):
+        figure = load_charts().CUSTOMER_FIGURES[chart](analytics)
+    with profile_stage(f"serialize: {chart}"):
+        return figure.to_dict()
+
+def render_customer_figure(chart, data_version):
+    draw_figure(chart, cached_customer_figure(chart, data_version))
+
+
+# Validation results (see gamevault.loading, 4g) change only with the data, so they are cached on the
+# data version alone like customer analytics
+@profiled_cache_data('data quality', max_entries=2, show_spinner=False)
+def data_quality(data_version):
+    with profile_stage("data quality"):
+        coverage, quarantine = data_backend().data_quality()
+        return quality_report(coverage, quarantine), quarantine_reasons(quarantine), quarantine
+
+# Deep memory_usage() walks every loaded frame and rollup, so the memory figures are cached on the
+# data version and on what is loaded (pages load frames and rollups lazily, without a new version)
+@profiled_cache_data('memory', max_entries=8, show_spinner=False)
+def memory_report(data_version, loaded):
+    return data_backend().memory_report()
+
+@profiled_cache_data('memory', max_entries=8, show_spinner=False)
+def memory_usage(data_version, loaded):
+    return data_backend().memory_usage()
+
+
+# --- 5c. Page Fragments ---
+# Pages are built from fragments that declare the sidebar filters they read. A fragment receives
+# only those filters (plus the data version), and its KPIs and charts come from caches keyed on
+# them. After a filter change, a fragment that does not read that filter is rebuilt from cached
+# results rather than recomputed. Each fragment is also an st.fragment, so a widget inside it
+# reruns just that fragment. With "Show render times" on, every fragment reports its render time
+# and which of its filters changed, if any (no change means it was rebuilt from cache). With the
+# profiling panel on, a fragment rerunning on its own is recorded in the rerun history too.
+def page_fragment(name, depends_on=()):
+    def decorator(render):
+        @st.fragment
+        def fragment(filters):
+            scope = {'version': filters['version'], **{key: filters[key] for key in depends_on}}
+            seen = st.session_state.setdefault('fragment_inputs', {})
+            previous = seen.get(name)
+            seen[name] = scope
+
+            standalone = filters['profiling'] and active_profile() is None
+            if standalone:
+                start_profile()
+            started = time.perf_counter()
+            with profile_stage(f"fragment: {name}"):
+                render(scope)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if standalone:
+                finish_profile(f"{name} (fragment)")
+
+            if filters['timings']:
+                if previous is None:
+                    status = "first render"
+                elif previous == scope:
+                    status = "filters unchanged"
+                else:
+                    changed = [key for key in scope if previous.get(key) != scope[key]]
+                    status = ", ".join(changed) + " changed"
+                reads = ", ".join(depends_on) or "no filters"
+                st.caption(f"⏱️ {name}: {elapsed_ms:.0f} ms · reads {reads} · {status}")
+        return fragment
+    return decorator
+
+
+# --- 5d. Profiling Panel ---
+# finish_profile() closes the rerun's record (see 2a) and keeps it in a per-session ring buffer of
+# the last PROFILE_HISTORY reruns, which the panel shows and exports as CSV (one row per metric,
+# easy to pivot or diff between runs) or JSON (one object per rerun).
+PROFILE_HISTORY = 50
+
+# GAMEVAULT_PROFILE=1 turns the panel on from a session's first rerun, so a cold start is measured too
+PROFILE_BY_DEFAULT = os.environ.get('GAMEVAULT_PROFILE', '0') == '1'
+
+def finish_profile(page):
+    run = stop_profile()
+    if run is None:
+        return None
+    record = {
+        'at': datetime.now().isoformat(timespec='milliseconds'),
+        'page': page,
+        'total_ms': round((time.perf_counter() - run['started']) * 1000, 1),
+        'stages': {name: {'calls': calls, 'ms': round(seconds * 1000, 1)} for name, (calls, seconds) in run['stages'].items()},
+        'caches': {name: {**counts, 'hits': counts['lookups'] - counts['misses']} for name, counts in run['caches'].items()},
+        'payload_bytes': run['payloads'],
+        'memory_mb': memory_usage(current_filters()['version'], data_backend().loaded_data()),
+    }
+    history = st.session_state.setdefault('profile_history', deque(maxlen=PROFILE_HISTORY))
+    history.append(record)
+    return record
+
+def profile_rows(record):
+    rows = [('total', 'rerun', record['total_ms'])]
+    for name, stage in record['stages'].items():
+        rows += [('stage_ms', name, stage['ms']), ('stage_calls', name, stage['calls'])]
+    for name, counts in record['caches'].items():
+        rows += [('cache_hits', name, counts['hits']), ('cache_misses', name, counts['misses'])]
+    rows += [('payload_bytes', chart, size) for chart, size in record['payload_bytes'].items()]
+    rows += [('memory_mb', name, round(mb, 3)) for name, mb in (record['memory_mb'] or {}).items()]
+    return [{'at': record['at'], 'page': record['page'], 'metric': metric, 'name': name, 'value': value}
+            for metric, name, value in rows]
+
+def profile_history_csv(history):
+    rows = [row for record in history for row in profile_rows(record)]
+    return pd.DataFrame(rows, columns=['at', 'page', 'metric', 'name', 'value']).to_csv(index=False)
+
+def render_profile_panel(record):
+    history = st.session_state['profile_history']
+    with st.expander("🔧 Profiling", expanded=True):
+        st.caption(f"{record['page']} rerun at {record['at']}: {record['total_ms']:,.1f} ms in total. "
+                   "Stage times include the stages nested inside them; cached results skip their stages.")
+        col_stages, col_caches = st.columns([3, 2])
+        with col_stages:
+            st.markdown("**Stages**")
+            stages = pd.DataFrame([{'Stage': name, 'Calls': stage['calls'], 'Time (ms)': stage['ms']}
+                                   for name, stage in record['stages'].items()])
+            st.dataframe(stages.sort_values('Time (ms)', ascending=False) if not stages.empty else stages, hide_index=True)
+        with col_caches:
+            st.markdown("**Caches**")
+            st.dataframe(pd.DataFrame([{'Cache': name, 'Hits': counts['hits'], 'Misses': counts['misses']}
+                                       for name, counts in record['caches'].items()]), hide_index=True)
+            st.markdown("**Chart payloads**")
+            st.dataframe(pd.DataFrame([{'Chart': chart, 'KB': round(size / 1024, 1)}
+                                       for chart, size in record['payload_bytes'].items()]), hide_index=True)
+            memory = record['memory_mb']
+            st.caption(f"In memory: {memory['frames']:.2f} MB of frames, {memory['rollups']:.2f} MB of rollups"
+                       if memory is not None else "Frames live in the database (SQLite backend).")
+
+        st.markdown(f"**Recent reruns** (last {PROFILE_HISTORY})")
+        st.dataframe(pd.DataFrame([{
+            'At': past['at'],
+            'Page': past['page'],
+            'Total (ms)': past['total_ms'],
+            'Cache hits': sum(counts['hits'] for counts in past['caches'].values()),
+            'Cache misses': sum(counts['misses'] for counts in past['caches'].values()),
+            'Payload (KB)': round(sum(past['payload_bytes'].values()) / 1024, 1),
+        } for past in reversed(history)]), hide_index=True)
+        col_csv, col_json = st.columns(2)
+        col_csv.download_button("Export history (CSV)", profile_history_csv(history),
+                                file_name="gamevault_profile.csv", mime="text/csv")
+        col_json.download_button("Export history (JSON)", json.dumps(list(history), indent=2),
+                                 file_name="gamevault_profile.json", mime="application/json")
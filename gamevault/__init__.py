@@ -0,0 +1,10 @@
+# Game Vault analytics core: plain pandas/numpy functions with no Streamlit imports, shared by the
+# dashboard (common.py and the pages), benchmark.py and the batch report CLI.
+#
+#   loading    sources, preprocessing, compact dtypes, on-disk cache and incremental ingestion
+#   rollups    daily rollups, date/game filters, the aggregates behind KPIs and charts
+#   customers  customer analytics (RFM, cohorts, lifetime value)
+#   backends   in-memory and SQLite data backends
+#   kpis       KPI calculations
+#   snapshots  KPI snapshots precomputed by report.py (python -m gamevault.report)
+#   profiling  stage timers and cache counters for the dashboard's profiling panel
@@ -0,0 +1,389 @@
+# Data backends: frames and rollups held in memory, or rows in SQLite with the rollups pushed down as SQL.
+import pandas as pd
+from datetime import datetime, timedelta
+import json
+import os
+import sqlite3
+import threading
+
+from .customers import build_customer_activity
+from .loading import (CACHE_VERSION, DATA_DIR, QUARANTINE_COLUMNS, SOURCE_FILES, date_coverage, memory_usage_mb,
+                      preprocess_rows, read_manifest, read_new_rows, read_quarantine, read_source_with_batches,
+                      read_synced_source, sync_source, write_manifest)
+from .profiling import count_cache, profile_stage
+from .rollups import (ROLLUP_FAMILIES, ROLLUP_FAMILY, build_daily_rollups, build_occupancy, filter_rollups,
+                      index_rollups, merge_rollups, rollup_families)
+
+
+# --- 4f. Data Backends ---
+# The dashboard talks to one backend per server process, shared by every session (see
+# common.data_backend()), and the report CLI opens its own. Both backends expose the same small API:
+# refresh() / version / refreshed_at for live updates, date_bounds() and games() for the sidebar,
+# filtered_rollups() returning the rollups of 4c for a date range and game, customer_activity()
+# returning the customer fact table and names of 4e, and data_quality() returning each source's date
+# coverage and the rows quarantined by validation (4g).
+#
+# 'csv' (default): LiveDataStore keeps the preprocessed frames and rollups in RAM.
+# 'sqlite': SQLiteBackend keeps the preprocessed rows in a local database file and runs the
+#           rollup aggregation per filter change as indexed SQL, so sessions hold query results only.
+DATA_BACKEND = os.environ.get('GAMEVAULT_BACKEND', 'csv')
+DATABASE_PATH = os.environ.get('GAMEVAULT_DB', os.path.join(DATA_DIR, 'gamevault.db'))
+
+# In LiveDataStore, sources are loaded and rollup families built on first use, so a page only pays
+# for the data it reads. refresh() is cheap when nothing changed (a stat() per loaded file) and
+# otherwise folds the new rows into the frames and built rollups. Readers use `snapshot`, which is
+# replaced rather than mutated, so a session never sees a half-updated state. Treat the frames as read-only.
+class LiveDataStore:
+    def __init__(self, read_only=False):
+        # read_only: use the cache as the last sync left it and never write to it (see open_backend())
+        self.read_only = read_only
+        self.lock = threading.RLock()
+        self.manifest = read_manifest()
+        self.frames = {}
+        self.snapshot = ({}, {})
+        self.version = 0
+        self.refreshed_at = datetime.now()
+
+    def load(self, sources):
+        with self.lock:
+            missing = [source for source in sources if source not in self.frames]
+            for source in missing:
+                # The preprocessed frame is read back from the on-disk cache unless the source changed
+                count_cache('on-disk frames', 'lookups')
+                with profile_stage(f"load: {source}"):
+                    load_source = read_synced_source if self.read_only else sync_source
+                    self.frames[source], rebuilt = load_source(source, self.manifest)
+                if rebuilt is None:
+                    count_cache('on-disk frames', 'misses')
+            if missing and not self.read_only:
+                write_manifest(self.manifest)
+            return {source: self.frames[source] for source in sources}
+
+    def rollups(self, names):
+        families = [family for family in rollup_families(names) if ROLLUP_FAMILIES[family][1][0] not in self.snapshot[0]]
+        if families:
+            with self.lock:
+                families = [family for family in families if ROLLUP_FAMILIES[family][1][0] not in self.snapshot[0]]
+                sources = {source for family in families for source in ROLLUP_FAMILIES[family][0]}
+                built = build_daily_rollups(self.load(sources), families)
+                rollups, indexes = self.snapshot
+                self.snapshot = ({**rollups, **built}, {**indexes, **index_rollups(built)})
+        return self.snapshot
+
+    def refresh(self):
+        if self.read_only:
+            return False
+        with self.lock:
+            recorded = json.dumps(self.manifest, sort_keys=True)
+            new_rows, rebuilt = {}, set()
+            for source in self.frames:
+                self.frames[source], rows = sync_source(source, self.manifest, self.frames[source])
+                if rows is None:
+                    rebuilt.add(source)
+                elif not rows.empty:
+                    new_rows[source] = rows
+            self.refreshed_at = datetime.now()
+            if not rebuilt and not new_rows:
+                # A file touched without new rows still gets its new signature saved, so that later
+                # refreshes (and restarts) do not hash it again
+                if json.dumps(self.manifest, sort_keys=True) != recorded:
+                    write_manifest(self.manifest)
+                return False
+
+            rollups, indexes = self.snapshot
+            built = [family for family in ROLLUP_FAMILIES if ROLLUP_FAMILIES[family][1][0] in rollups]
+            for family in built:
+                sources = ROLLUP_FAMILIES[family][0]
+                if rebuilt.intersection(sources):
+                    rollups = {**rollups, **build_daily_rollups({source: self.frames[source] for source in sources}, [family])}
+                elif new_rows.keys() & set(sources):
+                    new_rollups = build_daily_rollups({
+                        source: new_rows.get(source, self.frames[source].iloc[0:0]) for source in sources
+                    }, [family])
+                    rollups = merge_rollups(rollups, indexes, new_rollups)
+            self.snapshot = (rollups, index_rollups(rollups))
+            self.version += 1
+            write_manifest(self.manifest)
+            return True
+
+    def date_bounds(self):
+        dates = self.load(['visits'])['visits']['Date']
+        return dates.min(), dates.max()
+
+    def games(self):
+        games = self.load(['visits'])['visits']['Game Played']
+        return sorted(games.dropna().unique().tolist())
+
+    def filtered_rollups(self, start, end, game, names=tuple(ROLLUP_FAMILY)):
+        rollups, indexes = self.rollups(names)
+        with profile_stage("filter"):
+            return filter_rollups({name: rollups[name] for name in names}, indexes, start, end, game)
+
+    def customer_activity(self):
+        frames = self.load(['visits', 'snacks', 'tournaments'])
+        return build_customer_activity(frames['visits'], frames['snacks'], frames['tournaments'])
+
+    def data_quality(self):
+        # Loads every source, so each has been validated at least once
+        frames = self.load(list(SOURCE_FILES))
+        coverage = pd.DataFrame([date_coverage(source, df['Date']) for source, df in frames.items()])
+        quarantine = pd.concat([read_quarantine(source).assign(Source=source) for source in SOURCE_FILES], ignore_index=True)
+        return coverage, quarantine[['Source'] + QUARANTINE_COLUMNS]
+
+    def loaded_data(self):
+        # What memory_report() and memory_usage() cover; frames and rollups are loaded lazily
+        return tuple(self.frames), tuple(self.snapshot[0])
+
+    def memory_report(self):
+        report = []
+        for source, df in self.frames.items():
+            default_mb = self.manifest['sources'][source]['default_bytes'] / 1e6
+            compact_mb = memory_usage_mb(df)
+            report.append({
+                'Dataset': source,
+                'Rows': len(df),
+                'Default dtypes (MB)': round(default_mb, 3),
+                'Compact (MB)': round(compact_mb, 3),
+                'Saved': f"{1 - compact_mb / default_mb:.0%}" if default_mb else "-",
+            })
+        return pd.DataFrame(report)
+
+    def memory_usage(self):
+        # In-process footprint for the profiling panel, in MB
+        rollups = self.snapshot[0]
+        return {'frames': float(sum(memory_usage_mb(df) for df in self.frames.values())),
+                'rollups': float(sum(memory_usage_mb(df) for df in rollups.values()))}
+
+# Indexes backing the pushed-down filters: a date range on every table, plus game + date range on visits
+SQL_INDEXES = {
+    'visits': [['Date'], ['Game Played', 'Date']],
+    'snacks': [['Date']],
+    'snooker': [['Date']],
+    'table_football': [['Date']],
+    'tournaments': [['Date']],
+    'expenses': [['Date']],
+}
+
+# One query per rollup, producing the same frames as build_daily_rollups() + filter_rollups().
+# {dates} and {game_dates} are replaced by the WHERE conditions for the current filters.
+SQL_ROLLUPS = {
+    'daily': """
+        SELECT Date, 'visits' AS Source, "Game Played", SUM("Amount Paid (P)") AS Amount, COUNT(*) AS Transactions
+        FROM visits WHERE {game_dates} GROUP BY Date, "Game Played"
+        UNION ALL
+        SELECT Date, 'snacks', NULL, SUM(Total_Snack_Sale), COUNT(*) FROM snacks WHERE {dates} GROUP BY Date
+        UNION ALL
+        SELECT Date, 'snooker', NULL, SUM("Amount (P)"), COUNT(*) FROM snooker WHERE {dates} GROUP BY Date
+        UNION ALL
+        SELECT Date, 'table_football', NULL, SUM("Amount (P)"), COUNT(*) FROM table_football WHERE {dates} GROUP BY Date
+        UNION ALL
+        SELECT Date, 'tournaments', Game, SUM(EntryFeePaid), COUNT(*) FROM tournaments WHERE {dates} GROUP BY Date, Game
+        UNION ALL
+        SELECT Date, 'expenses', NULL, SUM("Amount (P)"), COUNT(*) FROM expenses WHERE {dates} GROUP BY Date
+        ORDER BY Date
+    """,
+    'gameplay': """
+        SELECT Date, "Game Played", COUNT(*) AS Visits, COALESCE(SUM(Duration), 0.0) AS Duration,
+               COUNT(Duration) AS Timed, SUM("Rating (1-5)") AS Rating
+        FROM visits WHERE {game_dates} GROUP BY Date, "Game Played" ORDER BY Date
+    """,
+    'customers': """
+        SELECT Date, "Game Played", CustomerID, "Customer Name", SUM("Amount Paid (P)") AS Amount, COUNT(*) AS Visits
+        FROM visits WHERE {game_dates} GROUP BY Date, "Game Played", CustomerID, "Customer Name" ORDER BY Date
+    """,
+    'ratings': """
+        SELECT Date, "Game Played", "Rating (1-5)", COUNT(*) AS Visits
+        FROM visits WHERE {game_dates} GROUP BY Date, "Game Played", "Rating (1-5)" ORDER BY Date
+    """,
+    'ages': """
+        SELECT Date, "Game Played", Age, COUNT(*) AS Visits
+        FROM visits WHERE {game_dates} GROUP BY Date, "Game Played", Age ORDER BY Date
+    """,
+    'snacks': """
+        SELECT Date, Snack, SUM(Quantity) AS Quantity, SUM(Total_Snack_Sale) AS Amount
+        FROM snacks WHERE {dates} GROUP BY Date, Snack ORDER BY Date
+    """,
+    'expenses': """
+        SELECT Date, "Expense Category", SUM("Amount (P)") AS "Amount (P)"
+        FROM expenses WHERE {dates} GROUP BY Date, "Expense Category" ORDER BY Date
+    """,
+    'tournaments': """
+        SELECT Date, Game AS "Game Played", COUNT(*) AS Entries, SUM(EntryFeePaid) AS Amount
+        FROM tournaments WHERE {dates} GROUP BY Date, Game ORDER BY Date
+    """,
+    'podium': """
+        SELECT Date, Game AS "Game Played", Position, CustomerID, "Participant Name", COUNT(*) AS Entries
+        FROM tournaments WHERE {dates} AND Position IS NOT NULL AND Position <> 'None'
+        GROUP BY Date, Game, Position, CustomerID, "Participant Name" ORDER BY Date
+    """,
+}
+
+# Occupancy is not a GROUP BY: the visit intervals are fetched and swept with build_occupancy()
+SQL_VISIT_INTERVALS = """
+    SELECT Date, "Game Played", Time, Duration FROM visits WHERE {game_dates} AND Time IS NOT NULL AND Duration > 0
+"""
+
+# Customer fact table of 4e: one row per customer per active day
+SQL_CUSTOMER_ACTIVITY = """
+    SELECT CustomerID, Date, SUM(Gameplay) AS Gameplay, SUM(Snacks) AS Snacks,
+           SUM(Tournaments) AS Tournaments, SUM(Visits) AS Visits
+    FROM (
+        SELECT CustomerID, Date, "Amount Paid (P)" AS Gameplay, 0.0 AS Snacks, 0.0 AS Tournaments, 1 AS Visits FROM visits
+        UNION ALL
+        SELECT CustomerID, Date, 0.0, Total_Snack_Sale, 0.0, 0 FROM snacks
+        UNION ALL
+        SELECT CustomerID, Date, 0.0, 0.0, EntryFeePaid, 0 FROM tournaments
+    )
+    WHERE CustomerID IS NOT NULL GROUP BY CustomerID, Date ORDER BY CustomerID, Date
+"""
+# SQLite takes the bare "Customer Name" from the row holding MAX(Date): the name at the latest visit
+SQL_CUSTOMER_NAMES = 'SELECT CustomerID, "Customer Name", MAX(Date) FROM visits GROUP BY CustomerID'
+
+def to_sql_rows(df):
+    # SQLite has no date/time types: dates become ISO text (so BETWEEN and the indexes work on them)
+    # and any remaining Python objects (e.g. start times) are stored as text.
+    rows = df.assign(Date=df['Date'].dt.strftime('%Y-%m-%d'))
+    object_columns = [column for column in rows.columns if rows[column].dtype == object]
+    return rows.astype({column: 'string' for column in object_columns})
+
+class SQLiteBackend:
+    def __init__(self, path, read_only=False):
+        self.lock = threading.Lock()
+        # One connection shared by all sessions; every use goes through self.lock
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _manifest (source TEXT PRIMARY KEY, entry TEXT)")
+        self.conn.execute('CREATE TABLE IF NOT EXISTS _quarantine (Source TEXT, Reason TEXT, "Row" TEXT)')
+        self.manifest = {
+            source: json.loads(entry) for source, entry in self.conn.execute("SELECT source, entry FROM _manifest")
+        }
+        self.version = 0
+        self.read_only = read_only
+        self.refreshed_at = datetime.now()
+        self.refresh()
+
+    def rebuild_table(self, source):
+        raw, entry = read_source_with_batches(source)
+        entry['version'] = CACHE_VERSION
+        self.manifest[source] = entry
+        rows, entry['default_bytes'], quarantined = preprocess_rows(source, raw)
+        to_sql_rows(rows).to_sql(source, self.conn, if_exists='replace', index=False)
+        self.conn.execute("DELETE FROM _quarantine WHERE Source = ?", (source,))
+        self.insert_quarantine(source, quarantined)
+        for columns in SQL_INDEXES[source]:
+            index_name = f"idx_{source}_" + "_".join(column.lower().replace(' ', '_') for column in columns)
+            quoted = ", ".join(f'"{column}"' for column in columns)
+            self.conn.execute(f'CREATE INDEX IF NOT EXISTS {index_name} ON {source} ({quoted})')
+
+    def insert_quarantine(self, source, quarantined):
+        self.conn.executemany("INSERT INTO _quarantine VALUES (?, ?, ?)",
+                              [(source, reason, row) for reason, row in zip(quarantined['Reason'], quarantined['Row'])])
+
+    def refresh(self):
+        # Same change detection as the CSV backend: appended rows are inserted, anything else (including
+        # tables written by an older version of the preprocessing) rebuilds the table
+        if self.read_only:
+            return False
+        with self.lock:
+            changed = False
+            for source in SOURCE_FILES:
+                entry = self.manifest.get(source)
+                recorded = json.dumps(entry)
+                current = entry is not None and entry.get('version') == CACHE_VERSION
+                raw = read_new_rows(source, entry) if current else None
+                if raw is None:
+                    self.rebuild_table(source)
+                elif raw.empty:
+                    # As in LiveDataStore.refresh(): save a touched file's new signature, with no new version
+                    if json.dumps(entry) != recorded:
+                        self.conn.execute("INSERT OR REPLACE INTO _manifest VALUES (?, ?)", (source, json.dumps(entry)))
+                    continue
+                else:
+                    stored_rows = lambda dates, source=source: self.stored_rows(source, dates)
+                    rows, default_bytes, quarantined = preprocess_rows(source, raw, stored_rows)
+                    entry['default_bytes'] = entry.get('default_bytes', 0) + default_bytes
+                    to_sql_rows(rows).to_sql(source, self.conn, if_exists='append', index=False)
+                    self.insert_quarantine(source, quarantined)
+                self.conn.execute("INSERT OR REPLACE INTO _manifest VALUES (?, ?)", (source, json.dumps(self.manifest[source])))
+                changed = True
+            self.conn.commit()
+            self.refreshed_at = datetime.now()
+            if changed:
+                self.version += 1
+            return changed
+
+    def stored_rows(self, source, dates):
+        # Rows already in a table on the given days, for the duplicate check of an appended batch. The
+        # caller holds self.lock, so this reads through the connection directly rather than query().
+        days = pd.DatetimeIndex(dates)
+        rows = pd.read_sql_query(f"SELECT * FROM {source} WHERE Date BETWEEN ? AND ?", self.conn,
+                                 params=(f"{days.min():%Y-%m-%d}", f"{days.max():%Y-%m-%d}"))
+        rows['Date'] = pd.to_datetime(rows['Date'], format='%Y-%m-%d')
+        return rows[rows['Date'].isin(days)]
+
+    def query(self, sql, params=None):
+        with self.lock:
+            result = pd.read_sql_query(sql, self.conn, params=params)
+        if 'Date' in result:
+            result['Date'] = pd.to_datetime(result['Date'], format='%Y-%m-%d')
+        return result
+
+    def date_bounds(self):
+        bounds = self.query('SELECT MIN(Date) AS first, MAX(Date) AS last FROM visits').iloc[0]
+        return pd.Timestamp(bounds['first']), pd.Timestamp(bounds['last'])
+
+    def games(self):
+        return self.query('SELECT DISTINCT "Game Played" FROM visits ORDER BY 1')['Game Played'].tolist()
+
+    def filtered_rollups(self, start, end, game, names=tuple(ROLLUP_FAMILY)):
+        # Sketch rollups are not built here: the exact aggregates are pushed down instead
+        params = {'start': start.strftime('%Y-%m-%d'), 'end': end.strftime('%Y-%m-%d'), 'game': game}
+        dates = 'Date BETWEEN :start AND :end'
+        game_dates = dates if game == 'All Games' else f'"Game Played" = :game AND {dates}'
+        with profile_stage("filter"):
+            rollups = {
+                name: self.query(SQL_ROLLUPS[name].format(dates=dates, game_dates=game_dates), params)
+                for name in names if name in SQL_ROLLUPS
+            }
+        if 'occupancy' not in names:
+            return rollups
+        # Start a day early so visits running past midnight into the range are counted
+        with profile_stage("filter"):
+            intervals = self.query(SQL_VISIT_INTERVALS.format(game_dates=game_dates),
+                                   {**params, 'start': (start - timedelta(days=1)).strftime('%Y-%m-%d')})
+        with profile_stage("rollups: occupancy"):
+            occupancy = build_occupancy(intervals['Date'], intervals['Game Played'], intervals['Time'], intervals['Duration'])
+        rollups['occupancy'] = occupancy[occupancy['Date'].between(start, end)].sort_values('Date', kind='stable', ignore_index=True)
+        return rollups
+
+    def customer_activity(self):
+        activity = self.query(SQL_CUSTOMER_ACTIVITY).astype({'CustomerID': 'Int64', 'Visits': 'int64'})
+        names = self.query(SQL_CUSTOMER_NAMES)
+        names = pd.Series(names['Customer Name'].astype('string').to_numpy(),
+                          index=names['CustomerID'].astype('Int64').to_numpy(), name='Customer Name')
+        return activity, names
+
+    def data_quality(self):
+        coverage = pd.concat([self.query(
+            f'SELECT \'{source}\' AS Source, COUNT(*) AS Rows, MIN(Date) AS first, MAX(Date) AS last, '
+            f'COUNT(DISTINCT Date) AS "Active Days" FROM {source}'
+        ) for source in SOURCE_FILES], ignore_index=True)
+        coverage['First Date'] = pd.to_datetime(coverage.pop('first'), format='%Y-%m-%d')
+        coverage['Last Date'] = pd.to_datetime(coverage.pop('last'), format='%Y-%m-%d')
+        return coverage, self.query('SELECT Source, Reason, "Row" FROM _quarantine ORDER BY rowid')
+
+    def loaded_data(self):
+        return ()
+
+    def memory_report(self):
+        # Rows live in the database file, not in the Streamlit process
+        return None
+
+    def memory_usage(self):
+        return None
+
+def open_backend(name=DATA_BACKEND, read_only=False):
+    # read_only backends serve the data as the last sync (by another process) left it and never
+    # ingest: several of them can run side by side without appending the same new rows each
+    if name == 'sqlite':
+        return SQLiteBackend(DATABASE_PATH, read_only)
+    return LiveDataStore(read_only)
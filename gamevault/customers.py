@@ -0,0 +1,116 @@
+# Customer analytics by CustomerID: RFM segments, cohort retention and lifetime value.
+import pandas as pd
+import numpy as np
+
+from .loading import widen_floats
+
+
+# --- 4e. Customer Analytics ---
+# Per-customer views keyed on CustomerID (names are not unique), over all recorded activity rather
+# than the sidebar filters. The backends supply a compact activity fact table, one row per customer
+# per active day with spend split by stream; everything below is a handful of groupbys over it and
+# runs once per data version (see customer_analytics()), not on every rerun.
+CUSTOMER_SPEND = ['Gameplay', 'Snacks', 'Tournaments']
+
+def build_customer_activity(visits, snacks, tournaments):
+    visits, snacks, tournaments = (widen_floats(df) for df in (visits, snacks, tournaments))
+    spend = pd.concat([
+        pd.DataFrame({'CustomerID': visits['CustomerID'], 'Date': visits['Date'],
+                      'Gameplay': visits['Amount Paid (P)'], 'Visits': 1}),
+        pd.DataFrame({'CustomerID': snacks['CustomerID'], 'Date': snacks['Date'], 'Snacks': snacks['Total_Snack_Sale']}),
+        pd.DataFrame({'CustomerID': tournaments['CustomerID'], 'Date': tournaments['Date'],
+                      'Tournaments': tournaments['EntryFeePaid']}),
+    ], ignore_index=True)
+    spend = spend.astype({'CustomerID': 'Int64'}).dropna(subset=['CustomerID'])
+    spend[CUSTOMER_SPEND + ['Visits']] = spend[CUSTOMER_SPEND + ['Visits']].fillna(0)
+    activity = spend.groupby(['CustomerID', 'Date'], as_index=False).sum()
+    activity['Visits'] = activity['Visits'].astype('int64')
+
+    # Name as of each customer's latest visit
+    latest = visits.sort_values('Date', kind='stable').drop_duplicates('CustomerID', keep='last')
+    names = pd.Series(latest['Customer Name'].astype('string').to_numpy(),
+                      index=latest['CustomerID'].astype('Int64').to_numpy(), name='Customer Name')
+    return activity, names
+
+def quintile_score(values):
+    # 1 (lowest fifth) .. 5 (highest fifth). Tied values share their average rank, so equal inputs
+    # always get equal scores even when a tie straddles two fifths.
+    return np.ceil(values.rank(method='average', pct=True) * 5).clip(1, 5).astype('int8')
+
+# First matching rule wins
+RFM_SEGMENTS = [
+    ('Champions', lambda r, f, m: (r >= 4) & (f >= 4)),
+    ('Loyal', lambda r, f, m: (r >= 3) & (f >= 4)),
+    ('New', lambda r, f, m: (r >= 4) & (f <= 2)),
+    ('At Risk', lambda r, f, m: (r <= 2) & (f >= 3)),
+    ('Hibernating', lambda r, f, m: (r <= 2) & (f <= 2)),
+]
+
+def month_number(dates):
+    return dates.dt.year * 12 + dates.dt.month - 1
+
+def cohort_matrix(values, cohort_sizes, cohort_labels, last_month):
+    # values: (Cohort, Month Offset) -> number. Rows are divided by cohort size, and offsets a cohort
+    # has not reached yet are left blank instead of showing as zero.
+    matrix = values.unstack(fill_value=0).reindex(columns=range(values.index.get_level_values(1).max() + 1), fill_value=0)
+    matrix = matrix.div(cohort_sizes, axis=0)
+    reached = (last_month - matrix.index.to_numpy())[:, None] >= matrix.columns.to_numpy()[None, :]
+    matrix = matrix.where(reached)
+    matrix.index = cohort_labels.reindex(matrix.index).to_numpy()
+    matrix.index.name, matrix.columns.name = 'Cohort', 'Months Since First Visit'
+    return matrix
+
+def analyse_customers(activity, names):
+    if activity.empty:
+        return None
+    as_of = activity['Date'].max()
+    activity = activity.assign(Spend=activity[CUSTOMER_SPEND].sum(axis=1), Month=month_number(activity['Date']))
+
+    customers = activity.groupby('CustomerID').agg(**{
+        'First Visit': ('Date', 'min'),
+        'Last Visit': ('Date', 'max'),
+        'Active Days': ('Date', 'size'),
+        'Visits': ('Visits', 'sum'),
+        **{stream: (stream, 'sum') for stream in CUSTOMER_SPEND},
+        'Lifetime Value': ('Spend', 'sum'),
+    })
+    fallback_names = pd.Series('Customer #' + customers.index.astype('string'), index=customers.index)
+    customers.insert(0, 'Customer Name', names.reindex(customers.index).fillna(fallback_names))
+
+    # RFM: recency in days since the last visit, frequency in active days, monetary as lifetime value
+    customers['Recency (days)'] = (as_of - customers['Last Visit']).dt.days
+    recency = quintile_score(-customers['Recency (days)'])
+    frequency = quintile_score(customers['Active Days'])
+    monetary = quintile_score(customers['Lifetime Value'])
+    customers['RFM'] = recency.astype('string') + frequency.astype('string') + monetary.astype('string')
+    rules = [rule(recency, frequency, monetary) for _, rule in RFM_SEGMENTS]
+    customers['Segment'] = np.select(rules, [name for name, _ in RFM_SEGMENTS], default='Needs Attention')
+
+    segments = customers.groupby('Segment').agg(**{
+        'Customers': ('Lifetime Value', 'size'),
+        'Lifetime Value': ('Lifetime Value', 'sum'),
+        'Avg. Lifetime Value': ('Lifetime Value', 'mean'),
+        'Avg. Recency (days)': ('Recency (days)', 'mean'),
+    }).sort_values('Lifetime Value', ascending=False)
+
+    # Monthly cohorts by first active month: share still active and cumulative spend per customer
+    first_month = activity.groupby('CustomerID')['Month'].transform('min')
+    by_cohort = activity.assign(Cohort=first_month, Offset=activity['Month'] - first_month)
+    cohort_sizes = by_cohort.groupby('Cohort')['CustomerID'].nunique()
+    cohort_labels = pd.Series(customers['First Visit'].dt.strftime('%b %Y').to_numpy(),
+                              index=month_number(customers['First Visit']).to_numpy())
+    cohort_labels = cohort_labels[~cohort_labels.index.duplicated()]
+    last_month = month_number(pd.Series([as_of])).iloc[0]
+
+    active = by_cohort.groupby(['Cohort', 'Offset'])['CustomerID'].nunique()
+    spend = by_cohort.groupby(['Cohort', 'Offset'])['Spend'].sum()
+    retention = cohort_matrix(active, cohort_sizes, cohort_labels, last_month)
+    cohort_ltv = cohort_matrix(spend, cohort_sizes, cohort_labels, last_month).cumsum(axis=1)
+
+    return {
+        'as_of': as_of,
+        'customers': customers.sort_values('Lifetime Value', ascending=False).reset_index(),
+        'segments': segments.reset_index(),
+        'retention': retention,
+        'cohort_ltv': cohort_ltv,
+    }
@@ -0,0 +1,45 @@
+# KPI calculations over filtered rollups. Each KPI names the rollups it reads, so callers build and
+# filter only those.
+from .rollups import (REVENUE_STREAMS, expense_totals, peak_load, snack_sales_by_type, tournament_entries_by_game,
+                      unique_customer_count)
+
+
+# --- 5. KPI Calculations ---
+def revenue_totals(filtered):
+    # Needs the 'daily' rollup: revenue per stream, expenses and profit
+    amount_by_source = filtered['daily'].groupby('Source')['Amount'].sum()
+    totals = {source: amount_by_source.get(source, 0) for source in list(REVENUE_STREAMS) + ['expenses']}
+    totals['revenue'] = sum(totals[source] for source in REVENUE_STREAMS)
+    totals['net_profit'] = totals['revenue'] - totals['expenses']
+    totals['profit_margin'] = (totals['net_profit'] / totals['revenue'] * 100) if totals['revenue'] != 0 else 0
+    return totals
+
+def gameplay_totals(filtered):
+    # Needs the 'gameplay' rollup. Visits whose Duration could not be read are counted but left
+    # out of the average duration.
+    gameplay = filtered['gameplay']
+    visits = int(gameplay['Visits'].sum())
+    timed_visits = int(gameplay['Timed'].sum())
+    return {
+        'visits': visits,
+        'untimed_visits': visits - timed_visits,
+        'average_duration': gameplay['Duration'].sum() / timed_visits if timed_visits else 0,
+        'average_rating': gameplay['Rating'].sum() / visits if visits else 0,
+    }
+
+def unique_customers_label(filtered, exact=False):
+    # Marks the KPI as an estimate when it came from the sketches
+    prefix = "" if exact or 'customer_sketch' not in filtered else "≈"
+    return f"{prefix}{unique_customer_count(filtered, exact):,}"
+
+# KPI name -> (rollups it reads, function of the filtered rollups plus any options)
+KPIS = {
+    'revenue': (['daily'], revenue_totals),
+    'gameplay': (['gameplay'], gameplay_totals),
+    'unique_customers': (['customers', 'customer_sketch'], unique_customers_label),
+    'peak_load': (['occupancy'], peak_load),
+    'snack_sales': (['snacks'], snack_sales_by_type),
+    'tournament_entries': (['tournaments'], tournament_entries_by_game),
+    'podium': (['podium'], lambda filtered: filtered['podium'].reset_index(drop=True)),
+    'expense_totals': (['expenses'], expense_totals),
+}
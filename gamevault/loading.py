@@ -0,0 +1,616 @@
+# Loading, preprocessing, the compact dtype schema and the on-disk cache with incremental ingestion.
+import pandas as pd
+import numpy as np
+import hashlib
+import io
+import json
+import os
+
+from .profiling import profile_stage
+
+try:
+    import pyarrow.feather as feather # Optional: enables the on-disk columnar cache
+except ImportError:
+    feather = None
+
+
+# --- 3. Data Loading ---
+# CSVs are read from the directory the app is launched from.
+DATA_DIR = "."
+
+# One entry per data source: the CSV export it comes from
+SOURCE_FILES = {
+    'visits': 'Visits_2027.csv',
+    'snacks': 'Snacks_2027.csv',
+    'snooker': 'Snooker_2027.csv',
+    'table_football': 'TableFootball_2027.csv',
+    'tournaments': 'Tournaments_2027.csv',
+    'expenses': 'Expenses_2027.csv',
+}
+
+def read_source_csv(source):
+    return pd.read_csv(os.path.join(DATA_DIR, SOURCE_FILES[source]))
+
+# --- 4. Data Preprocessing & Feature Engineering ---
+# Every step below is vectorized and returns a new frame (no inplace renames). Its output is
+# cached on disk (see 4b) and held by the shared data backend (see 4f), so widget
+# interactions only pay for filtering and charts.
+
+# Date formats used by each CSV export; parsing with an explicit format avoids per-row inference.
+DATE_FORMATS = {
+    'visits': '%m/%d/%Y',
+    'snacks': '%m/%d/%Y',
+    'snooker': '%Y-%m-%d',
+    'table_football': '%Y-%m-%d',
+    'tournaments': '%m/%d/%Y',
+    'expenses': '%Y-%m-%d',
+}
+
+# Start-time formats seen in the visits log, tried in order (first match wins)
+TIME_FORMATS = ['%I:%M:%S %p', '%H:%M:%S', '%I:%M %p', '%H:%M']
+
+# Hour buckets for 'Time of Day Category': 7-11 Morning, 12-16 Afternoon, everything else Evening
+TIME_OF_DAY_BINS = [-1, 6, 11, 16, 23]
+TIME_OF_DAY_LABELS = ['Evening', 'Morning', 'Afternoon', 'Evening']
+
+def parse_dates(series, fmt):
+    return pd.to_datetime(series, format=fmt, errors='coerce')
+
+def parse_times(series):
+    # Vectorized replacement for the old row-by-row strptime loop: each format is applied to
+    # the whole column at once and only fills rows that earlier formats could not parse.
+    text = series.astype('string').str.strip()
+    parsed = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    for fmt in TIME_FORMATS:
+        parsed = parsed.fillna(pd.to_datetime(text, format=fmt, errors='coerce'))
+    return parsed
+
+def to_number(series):
+    # Unreadable values stay NaN: validate_rows() quarantines them instead of counting them as zero
+    return pd.to_numeric(series, errors='coerce')
+
+# Visit lengths as typed at the desk: "1 hour", "30 mins", "1.5 hours", "1h 30m", "1:30" (h:mm) or a
+# bare number of minutes
+DURATION_UNITS_PATTERN = (
+    r'^(?:(?P<hours>\d+(?:\.\d+)?)\s*(?:h|hr|hrs|hour|hours))?\s*'
+    r'(?:(?P<minutes>\d+(?:\.\d+)?)\s*(?:m|min|mins|minute|minutes))?$'
+)
+DURATION_CLOCK_PATTERN = r'^(?P<hours>\d+):(?P<minutes>[0-5]\d)$'
+
+def parse_durations(series):
+    # Returns minutes as floats, NaN where the text is missing or unreadable. Durations repeat a
+    # handful of spellings, so each distinct spelling is parsed once and mapped back by its code.
+    codes, spellings = pd.factorize(series.astype('string').str.strip().str.lower())
+    spellings = pd.Series(spellings, dtype='string')
+    # A leading minus is kept rather than making the spelling unreadable, so validation can reject it
+    negative = spellings.str.startswith('-')
+    spellings = spellings.str.removeprefix('-').str.strip()
+
+    units = spellings.str.extract(DURATION_UNITS_PATTERN).astype('float')
+    has_units = units.notna().any(axis=1)
+    minutes = (units['hours'].fillna(0) * 60 + units['minutes'].fillna(0)).where(has_units)
+
+    clock = spellings.str.extract(DURATION_CLOCK_PATTERN).astype('float')
+    minutes = minutes.fillna(clock['hours'] * 60 + clock['minutes'])
+    minutes = minutes.fillna(pd.to_numeric(spellings, errors='coerce'))
+    minutes = minutes.mask(negative.to_numpy(), -minutes)
+
+    parsed = np.append(minutes.to_numpy(dtype='float64'), np.nan)
+    return pd.Series(parsed[codes], index=series.index)  # code -1 (missing) picks the trailing NaN
+
+def preprocess_visits(visits):
+    visits = visits.rename(columns={'Start Time': 'Time', 'Name': 'Customer Name'})
+    visits['Date'] = parse_dates(visits['Date'], DATE_FORMATS['visits'])
+
+    # Start time stays a parsed timestamp here; apply_schema() stores it as minutes after midnight
+    start_times = parse_times(visits['Time'])
+    visits['Time'] = start_times
+    visits['Hour'] = start_times.dt.hour.astype('Int8')
+    visits['Day of Week'] = visits['Date'].dt.day_name()
+    visits['Month'] = visits['Date'].dt.month_name()
+    visits['Time of Day Category'] = pd.cut(
+        visits['Hour'].astype('float'), bins=TIME_OF_DAY_BINS, labels=TIME_OF_DAY_LABELS, ordered=False
+    )
+
+    visits['Age'] = to_number(visits['Age'])
+    visits['Amount Paid (P)'] = to_number(visits['Amount Paid (P)'])
+    # Unreadable durations stay NaN (not 0) so they do not drag the average down; the rollups count them
+    visits['Duration'] = parse_durations(visits['Duration'])
+    visits['Rating (1-5)'] = to_number(visits['Rating (1-5)'])
+    return visits
+
+def preprocess_snacks(snacks):
+    snacks = snacks.rename(columns={'Snack Type': 'Snack', 'Unit Price': 'Price (P)', 'Total Price': 'Total_Snack_Sale'})
+    snacks['Date'] = parse_dates(snacks['Date'], DATE_FORMATS['snacks'])
+    snacks['Price (P)'] = to_number(snacks['Price (P)'])
+    snacks['Quantity'] = to_number(snacks['Quantity'])
+    snacks['Total_Snack_Sale'] = to_number(snacks['Total_Snack_Sale'])
+    return snacks
+
+def preprocess_amounts(df, source):
+    # snooker and table_football share the same two-column layout
+    df = df.rename(columns={'Amount Paid (P)': 'Amount (P)'})
+    df['Date'] = parse_dates(df['Date'], DATE_FORMATS[source])
+    df['Amount (P)'] = to_number(df['Amount (P)'])
+    return df
+
+def preprocess_tournaments(tournaments):
+    tournaments = tournaments.rename(columns={'Entry Fee (P)': 'EntryFeePaid', 'Name': 'Participant Name'})
+    tournaments['Date'] = parse_dates(tournaments['Date'], DATE_FORMATS['tournaments'])
+    tournaments['EntryFeePaid'] = to_number(tournaments['EntryFeePaid'])
+    return tournaments
+
+def preprocess_expenses(expenses):
+    expenses = expenses.copy()
+    expenses['Date'] = parse_dates(expenses['Date'], DATE_FORMATS['expenses'])
+    expenses['Amount (P)'] = to_number(expenses['Amount (P)'])
+    return expenses
+
+PREPROCESSORS = {
+    'visits': preprocess_visits,
+    'snacks': preprocess_snacks,
+    'snooker': lambda df: preprocess_amounts(df, 'snooker'),
+    'table_football': lambda df: preprocess_amounts(df, 'table_football'),
+    'tournaments': preprocess_tournaments,
+    'expenses': preprocess_expenses,
+}
+
+# --- 4a. Compact Dtype Schema ---
+# Applied to every preprocessed frame, so the frames held in memory (and in the Feather cache) are
+# as small as the data allows: repeated text becomes categoricals, integers take the smallest type
+# that holds their range, floats become float32 only when that is lossless (amounts must not drift),
+# and start times are stored as integer minutes after midnight.
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June',
+          'July', 'August', 'September', 'October', 'November', 'December']
+
+# Categoricals with a fixed, ordered set of values (stable across loads, so appends stay categorical)
+ORDERED_CATEGORIES = {'Day of Week': WEEKDAYS, 'Month': MONTHS}
+
+# Free-text columns with few distinct values, per source
+CATEGORY_COLUMNS = {
+    'visits': ['Customer Name', 'Game Played'],
+    'snacks': ['Snack'],
+    'snooker': [],
+    'table_football': [],
+    'tournaments': ['Game', 'Participant Name', 'Position'],
+    'expenses': ['Expense Category'],
+}
+
+def compact_numeric(series):
+    if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    if pd.api.types.is_float_dtype(series) and series.dtype != 'float32':
+        as_float32 = series.astype('float32')
+        if as_float32.astype('float64').equals(series.astype('float64')):
+            return as_float32
+    return series
+
+def apply_schema(df, source):
+    df = df.copy()
+    for column, values in ORDERED_CATEGORIES.items():
+        if column in df:
+            df[column] = pd.Categorical(df[column], categories=values, ordered=True)
+    for column in CATEGORY_COLUMNS[source]:
+        # Only where it pays off: with nearly one value per row (e.g. names in a short log) the
+        # categories cost more than the text they replace
+        categorical = df[column].astype('category')
+        if categorical.memory_usage(deep=True) < df[column].memory_usage(deep=True):
+            df[column] = categorical
+    if 'Time' in df:
+        df['Time'] = (df['Time'].dt.hour * 60 + df['Time'].dt.minute).astype('Int16')
+    for column in df.columns:
+        if column != 'Date':
+            df[column] = compact_numeric(df[column])
+    return df
+
+def align_categories(frame, new_rows):
+    # Give both frames' categorical columns the same categories so concatenating keeps them categorical.
+    # Existing categories keep their codes; only values first seen in new_rows are added.
+    for column in frame.columns:
+        if isinstance(new_rows[column].dtype, pd.CategoricalDtype) and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            # apply_schema() left this column as text in the frame; the new rows follow it
+            new_rows[column] = new_rows[column].astype(frame[column].dtype)
+        elif isinstance(frame[column].dtype, pd.CategoricalDtype) and not frame[column].cat.ordered:
+            combined = frame[column].cat.categories.union(new_rows[column].astype('category').cat.categories, sort=False)
+            frame[column] = frame[column].cat.set_categories(combined)
+            new_rows[column] = pd.Categorical(new_rows[column], categories=combined)
+    return frame, new_rows
+
+def widen_floats(df):
+    # Undo float32 compaction before aggregating, so sums accumulate in float64
+    return df.astype({column: 'float64' for column in df.columns if df[column].dtype == 'float32'})
+
+def memory_usage_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+# --- 4b. Columnar On-Disk Cache & Incremental Ingestion ---
+# Preprocessed frames are stored as Feather files in a cache folder next to the CSVs, so a cold
+# start (or a worker restart) memory-maps typed columns instead of re-parsing text. A source is
+# only ever parsed in full when its history changed: mtime/size are checked first, the file hash
+# decides whether a touched file really has new content, and rows appended to the end of a CSV
+# (or dropped into incoming/ as batch files) are parsed on their own and appended to the cached
+# frame. Without pyarrow nothing is written to disk and every cold start parses the CSVs.
+CACHE_DIR = os.path.join(DATA_DIR, ".gamevault_cache")
+CACHE_MANIFEST = os.path.join(CACHE_DIR, "manifest.json")
+# Bump whenever preprocessing changes so that existing cache files are rebuilt
+CACHE_VERSION = 10
+
+# Drop folder for batch exports: a CSV in incoming/ whose name starts with a source's prefix
+# (e.g. incoming/Visits_2027-10-02.csv) is appended to that source, once.
+INCOMING_DIR = os.path.join(DATA_DIR, "incoming")
+BATCH_PREFIXES = {
+    'visits': 'Visits_',
+    'snacks': 'Snacks_',
+    'snooker': 'Snooker_',
+    'table_football': 'TableFootball_',
+    'tournaments': 'Tournaments_',
+    'expenses': 'Expenses_',
+}
+
+def file_signature(path):
+    stat = os.stat(path)
+    return {'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_manifest():
+    if feather is None:
+        return {}
+    try:
+        with open(CACHE_MANIFEST) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return manifest if manifest.get('version') == CACHE_VERSION else {}
+
+def write_manifest(manifest):
+    if feather is None:
+        return
+    # Write to a temp file and swap it in, so a crash never leaves a half-written manifest. The temp
+    # file is per process: report workers (see gamevault.report) may write at the same time.
+    manifest['version'] = CACHE_VERSION
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{CACHE_MANIFEST}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, CACHE_MANIFEST)
+
+def write_cached_frame(source, df):
+    if feather is None:
+        return
+    # Swapped in like the manifest, so a process reading the cache never maps a half-written file
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{source}.feather")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    df.to_feather(tmp_path)
+    os.replace(tmp_path, path)
+
+def batch_files(source):
+    try:
+        names = sorted(os.listdir(INCOMING_DIR))
+    except FileNotFoundError:
+        return {}
+    return {
+        name: file_signature(os.path.join(INCOMING_DIR, name))
+        for name in names
+        if name.startswith(BATCH_PREFIXES[source]) and name.endswith('.csv')
+    }
+
+def read_batch_file(name):
+    return pd.read_csv(os.path.join(INCOMING_DIR, name))
+
+def read_appended_csv_rows(csv_path, entry):
+    # If the CSV only grew (its first `size` bytes still hash to the recorded value), return the raw
+    # appended rows and the hash of the whole file; otherwise None. History is hashed, never parsed.
+    old_size = entry['signature']['size']
+    digest = hashlib.sha256()
+    last_byte = b""
+    with open(csv_path, "rb") as f:
+        remaining = old_size
+        while remaining:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                return None
+            digest.update(chunk)
+            last_byte = chunk[-1:]
+            remaining -= len(chunk)
+        # A previous last line without a newline means the "append" continued an existing row
+        if digest.hexdigest() != entry['hash'] or last_byte != b"\n":
+            return None
+        appended = f.read()
+    digest.update(appended)
+
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    if appended.strip():
+        rows = pd.read_csv(io.BytesIO(appended), header=None, names=columns)
+    else:
+        rows = pd.DataFrame(columns=columns)
+    return rows, digest.hexdigest()
+
+def preprocess_rows(source, raw, stored_rows=None):
+    # Returns the compact frame of valid rows, sorted by Date so that date filters can binary-search
+    # it (see slice_dates), the bytes the same rows would take with pandas' default dtypes, and the
+    # quarantined rows (see 4g). stored_rows(dates), when given, returns the rows already held for
+    # those days, so that new rows repeating them are quarantined as duplicates too.
+    with profile_stage(f"preprocess: {source}"):
+        parsed = PREPROCESSORS[source](raw)
+    df = apply_schema(parsed, source)
+    with profile_stage(f"validate: {source}"):
+        valid, quarantined = validate_rows(source, raw, df, stored_rows)
+    default_bytes = int(parsed.memory_usage(deep=True).sum())
+    if not quarantined.empty:
+        default_bytes -= int(parsed[~valid].memory_usage(deep=True, index=False).sum())
+    # Leaving out the quarantined rows and sorting by Date share one reordering of the frame
+    kept = np.flatnonzero(valid)
+    kept = kept[np.argsort(df['Date'].to_numpy()[kept], kind='stable')]
+    return df.take(kept).reset_index(drop=True), default_bytes, quarantined
+
+def rows_on_dates(frame, dates):
+    # Rows of a Date-sorted frame on any of the given days, found by binary search
+    column = frame['Date'].to_numpy()
+    days = np.sort(np.asarray(dates, dtype=column.dtype))
+    starts, ends = np.searchsorted(column, days, side='left'), np.searchsorted(column, days, side='right')
+    return frame.iloc[np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)] + [np.array([], 'int64')])]
+
+def append_rows(frame, new_rows):
+    frame, new_rows = align_categories(frame.copy(), new_rows)
+    combined = pd.concat([frame, new_rows], ignore_index=True)
+    # Live logs usually append in date order; only re-sort when they did not
+    if not combined['Date'].is_monotonic_increasing:
+        combined = combined.sort_values('Date', kind='stable', ignore_index=True)
+    return combined
+
+def read_source_with_batches(source):
+    # Full raw history of a source (its CSV plus every batch file) and the manifest entry describing it
+    csv_path = os.path.join(DATA_DIR, SOURCE_FILES[source])
+    signature = file_signature(csv_path)
+    batches = batch_files(source)
+    raw = pd.concat([read_source_csv(source)] + [read_batch_file(name) for name in batches], ignore_index=True)
+    return raw, {'signature': signature, 'hash': file_hash(csv_path), 'batches': batches}
+
+def read_new_rows(source, entry):
+    # Raw rows added to a source since `entry` was recorded (CSV appends and new batch files),
+    # updating entry to match. Returns None when history changed and the source must be rebuilt.
+    csv_path = os.path.join(DATA_DIR, SOURCE_FILES[source])
+    raw_parts = []
+    signature = file_signature(csv_path)
+    if signature != entry['signature']:
+        appended = read_appended_csv_rows(csv_path, entry) if signature['size'] > entry['signature']['size'] else None
+        if appended is not None:
+            rows, entry['hash'] = appended
+            raw_parts.append(rows)
+        elif file_hash(csv_path) != entry['hash']:
+            return None
+        # mtime/size changed without new content (e.g. the file was copied or touched)
+        entry['signature'] = signature
+
+    batches = batch_files(source)
+    if any(batches.get(name) != batch_signature for name, batch_signature in entry['batches'].items()):
+        # A batch that was already ingested has been edited or removed
+        return None
+    for name in batches:
+        if name not in entry['batches']:
+            raw_parts.append(read_batch_file(name))
+            entry['batches'][name] = batches[name]
+
+    if not raw_parts:
+        return pd.DataFrame()
+    return pd.concat(raw_parts, ignore_index=True)
+
+def rebuild_source(source, manifest):
+    raw, entry = read_source_with_batches(source)
+    df, entry['default_bytes'], quarantined = preprocess_rows(source, raw)
+    manifest.setdefault('sources', {})[source] = entry
+    write_cached_frame(source, df)
+    write_quarantine(source, quarantined)
+    return df
+
+def sync_source(source, manifest, frame=None):
+    # Bring one source's preprocessed frame up to date. Returns (frame, new_rows), where new_rows
+    # holds just the rows added since the last sync (empty if nothing changed), or is None when
+    # the source had to be rebuilt from scratch.
+    cache_path = os.path.join(CACHE_DIR, f"{source}.feather")
+    entry = manifest.get('sources', {}).get(source)
+    if entry is None:
+        return rebuild_source(source, manifest), None
+    if frame is None:
+        if not os.path.exists(cache_path):
+            return rebuild_source(source, manifest), None
+        frame = feather.read_table(cache_path, memory_map=True).to_pandas()
+
+    raw = read_new_rows(source, entry)
+    if raw is None:
+        return rebuild_source(source, manifest), None
+    if raw.empty:
+        return frame, frame.iloc[0:0]
+    new_rows, default_bytes, quarantined = preprocess_rows(source, raw, lambda dates: rows_on_dates(frame, dates))
+    entry['default_bytes'] += default_bytes
+    frame = append_rows(frame, new_rows)
+    write_cached_frame(source, frame)
+    write_quarantine(source, quarantined, append=True)
+    return frame, new_rows
+
+def read_synced_source(source, manifest):
+    # Read-only counterpart of sync_source() for processes that must not ingest (report workers): the
+    # frame as of the last sync recorded in manifest, without looking for new rows or writing the
+    # cache, manifest or quarantine. Returns (frame, new_rows) like sync_source(); with no cache to
+    # read (e.g. without pyarrow) the source is parsed in memory and new_rows is None.
+    cache_path = os.path.join(CACHE_DIR, f"{source}.feather")
+    if feather is not None and source in manifest.get('sources', {}) and os.path.exists(cache_path):
+        frame = feather.read_table(cache_path, memory_map=True).to_pandas()
+        return frame, frame.iloc[0:0]
+    raw, _ = read_source_with_batches(source)
+    return preprocess_rows(source, raw)[0], None
+
+
+# --- 4g. Validation & Quarantine ---
+# preprocess_rows() checks every batch of rows it parses: a rebuild checks the whole history, an
+# incremental sync the new rows (against the stored rows of the same days for duplicates), and
+# either way the result is cached with the frame. A row that fails a check is left out of the frame
+# and kept in its source's quarantine with the reasons, instead of being coerced to zero. Each check
+# is one vectorized comparison over a column of the compact frame.
+AGE_RANGE = (5, 100)
+RATING_RANGE = (1, 5)
+
+# Checks build (reason, check) pairs, where check maps the compact frame to a mask of failing
+# rows. Reasons name the column as it appears in the CSV export (label), not its renamed form.
+def required(column, label=None):
+    # Missing, or text the preprocessors could not parse (both are left as NaN/NaT)
+    return f"missing or unreadable {label or column}", lambda df: df[column].isna()
+
+def non_negative(column, label=None):
+    return f"negative {label or column}", lambda df: df[column] < 0
+
+def positive(column, label=None):
+    # Missing values pass; required() covers them where they matter
+    return f"zero or negative {label or column}", lambda df: df[column] <= 0
+
+def within(column, low, high, label=None):
+    return f"{label or column} outside {low}-{high}", lambda df: df[column].notna() & ~df[column].between(low, high)
+
+VALIDATION_CHECKS = {
+    'visits': [
+        required('Date'),
+        # Rows without a customer or game would be dropped silently by the rollups' groupbys
+        required('CustomerID'), required('Game Played'),
+        required('Time', 'Start Time'),
+        required('Amount Paid (P)'), non_negative('Amount Paid (P)'),
+        # Unreadable durations are kept (and left out of the average duration), impossible ones are not
+        positive('Duration'),
+        required('Rating (1-5)'), within('Rating (1-5)', *RATING_RANGE),
+        required('Age'), within('Age', *AGE_RANGE),
+    ],
+    'snacks': [
+        required('Date'), required('Snack', 'Snack Type'),
+        required('Quantity'), non_negative('Quantity'),
+        required('Price (P)', 'Unit Price'), non_negative('Price (P)', 'Unit Price'),
+        required('Total_Snack_Sale', 'Total Price'), non_negative('Total_Snack_Sale', 'Total Price'),
+    ],
+    'snooker': [required('Date'), required('Amount (P)', 'Amount Paid (P)'), non_negative('Amount (P)', 'Amount Paid (P)')],
+    'table_football': [required('Date'), required('Amount (P)', 'Amount Paid (P)'), non_negative('Amount (P)', 'Amount Paid (P)')],
+    'tournaments': [
+        required('Date'), required('Game'),
+        required('EntryFeePaid', 'Entry Fee (P)'), non_negative('EntryFeePaid', 'Entry Fee (P)'),
+    ],
+    'expenses': [required('Date'), required('Amount (P)'), non_negative('Amount (P)')],
+}
+
+# Columns (as preprocessed) that identify a row; later copies are quarantined as double entries. For
+# visits and expenses that is every column read from the export. Snack, snooker and table football
+# logs repeat identical rows legitimately (the same sale twice on a day), so they are not checked.
+# Every key includes Date, so an incremental sync only compares against the stored rows of its days.
+DUPLICATE_KEYS = {
+    'visits': ['CustomerID', 'Customer Name', 'Age', 'Game Played', 'Date', 'Amount Paid (P)', 'Duration', 'Time',
+               'Rating (1-5)'],
+    'tournaments': ['Date', 'Game', 'CustomerID'],
+    'expenses': ['Expense Category', 'Amount (P)', 'Date'],
+}
+
+QUARANTINE_COLUMNS = ['Reason', 'Row']
+
+def key_values(series):
+    # One representation per kind of key column, whichever frame holds it: compact dtypes in memory,
+    # or wide numbers and plain text read back from SQLite
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype('datetime64[ns]')
+    if pd.api.types.is_numeric_dtype(series):
+        return pd.Series(series.to_numpy(dtype='float64', na_value=np.nan), index=series.index)
+    return series.astype('string')
+
+def folded_keys(df, keys):
+    # The numeric and date key columns folded into one integer per row. Equal keys always fold to the
+    # same integer; text columns are left out, so different keys can too (they are told apart later).
+    folded = np.zeros(len(df), dtype='uint64')
+    for column in keys:
+        if pd.api.types.is_datetime64_any_dtype(df[column]) or pd.api.types.is_numeric_dtype(df[column]):
+            bits = key_values(df[column]).to_numpy().view('uint64')
+            folded = folded * np.uint64(0x9E3779B97F4A7C15) + bits
+    return folded
+
+def duplicate_rows(df, keys, stored_rows=None):
+    # Mask of the rows of df repeating an earlier row of df, or a stored row, on keys. Comparing text
+    # is slow at full-history scale, so only rows whose folded keys repeat are compared in full.
+    dates = df['Date'].dropna().unique()
+    stored = df.iloc[0:0] if stored_rows is None or not len(dates) else stored_rows(dates)
+    folded, stored_folded = folded_keys(df, keys), folded_keys(stored, keys)
+    ordered = np.sort(folded)
+    candidates = np.isin(folded, ordered[1:][ordered[1:] == ordered[:-1]]) | np.isin(folded, stored_folded)
+    duplicated = np.zeros(len(df), dtype=bool)
+    if candidates.any():
+        earlier = stored[np.isin(stored_folded, folded[candidates])]
+        combined = pd.concat([pd.DataFrame({column: key_values(rows[column]).to_numpy() for column in keys})
+                              for rows in (earlier, df[candidates])], ignore_index=True)
+        duplicated[candidates] = combined.duplicated().to_numpy()[len(earlier):]
+    return duplicated
+
+def validate_rows(source, raw, df, stored_rows=None):
+    # Returns a mask of the rows of df (the compact frame of raw) that pass every check, and the others as raw CSV values (a JSON
+    # object per row) with their reasons joined by "; "
+    failures = pd.DataFrame({reason: check(df) for reason, check in VALIDATION_CHECKS[source]}, index=df.index)
+    if source in DUPLICATE_KEYS:
+        failures['duplicate row'] = duplicate_rows(df, DUPLICATE_KEYS[source], stored_rows)
+    rejected = failures.any(axis=1).to_numpy()
+    if not rejected.any():
+        return ~rejected, pd.DataFrame(columns=QUARANTINE_COLUMNS)
+
+    flags = failures[rejected]
+    reasons = pd.Series('', index=flags.index)
+    for reason in flags.columns:
+        reasons = reasons.mask(flags[reason], reasons + reason + '; ')
+    rows = raw[rejected].to_json(orient='records', lines=True, date_format='iso').replace('\\/', '/').splitlines()
+    quarantined = pd.DataFrame({'Reason': reasons.str[:-2].to_numpy(), 'Row': rows})
+    return ~rejected, quarantined
+
+# Quarantined rows are kept next to the cache, one CSV per source, rewritten on a rebuild and appended
+# to by incremental syncs. They are tiny, so they are written with or without pyarrow.
+def quarantine_path(source):
+    return os.path.join(CACHE_DIR, f"{source}.quarantine.csv")
+
+def write_quarantine(source, quarantined, append=False):
+    path = quarantine_path(source)
+    append = append and os.path.exists(path)
+    if append and quarantined.empty:
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    quarantined.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+
+def read_quarantine(source):
+    try:
+        return pd.read_csv(quarantine_path(source), dtype='string', keep_default_na=False)
+    except FileNotFoundError:
+        return pd.DataFrame(columns=QUARANTINE_COLUMNS)
+
+def date_coverage(source, dates):
+    # One row of the data-quality report: how many valid rows a source has and which days they cover
+    first, last = dates.min(), dates.max()
+    active_days = dates.dt.normalize().nunique()
+    return {'Source': source, 'Rows': len(dates), 'First Date': first, 'Last Date': last, 'Active Days': active_days}
+
+def quality_report(coverage, quarantine):
+    # Per-source summary for the dashboard: rows checked, accepted and quarantined, and the date range
+    # with the number of days inside it that have no rows (expected for sparse logs such as expenses)
+    report = coverage.set_index('Source')
+    quarantined = quarantine.groupby('Source').size().reindex(report.index, fill_value=0)
+    checked = report['Rows'] + quarantined
+    span_days = (report['Last Date'] - report['First Date']).dt.days + 1
+    return pd.DataFrame({
+        'Checked': checked,
+        'Accepted': report['Rows'],
+        'Quarantined': quarantined,
+        'Quarantined %': (quarantined / checked.where(checked > 0) * 100).round(2).fillna(0),
+        'First Date': report['First Date'],
+        'Last Date': report['Last Date'],
+        'Days Without Rows': (span_days - report['Active Days']).fillna(0).astype(int),
+    }).reset_index()
+
+def quarantine_reasons(quarantine):
+    # Rows per source and single reason (a row failing two checks is counted under both)
+    reasons = quarantine.assign(Reason=quarantine['Reason'].str.split('; ')).explode('Reason')
+    return reasons.groupby(['Source', 'Reason']).size().rename('Rows').reset_index().sort_values(
+        ['Source', 'Rows'], ascending=[True, False], ignore_index=True)
@@ -0,0 +1,47 @@
+# Profiling hooks shared by the analytics core and the dashboard; pure Python, no Streamlit.
+from contextlib import contextmanager
+import threading
+import time
+
+
+# --- 2a. Profiling Hooks ---
+# A small instrumentation layer behind the dashboard's "Profiling panel" toggle. While a run is
+# profiled (start_profile() .. stop_profile()), `with profile_stage(name):` adds the block's wall
+# time to that run's record and count_cache() tallies cache lookups and misses; otherwise both
+# cost one thread-local lookup. Stages nest, so a stage's time includes the stages inside it.
+# Records are per thread, so sessions rerunning in their own script threads do not mix.
+_profiling = threading.local()
+
+def start_profile(enabled=True, started=None):
+    # started: a time.perf_counter() reading to count from, if the run began before profiling could
+    _profiling.run = {'started': started or time.perf_counter(), 'stages': {}, 'caches': {}, 'payloads': {}} if enabled else None
+
+def active_profile():
+    return getattr(_profiling, 'run', None)
+
+def stop_profile():
+    run = active_profile()
+    _profiling.run = None
+    return run
+
+@contextmanager
+def profile_stage(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+def record_stage(name, seconds):
+    # Also used directly for time measured before the run started, such as module imports
+    run = active_profile()
+    if run is not None:
+        calls, total = run['stages'].get(name, (0, 0.0))
+        run['stages'][name] = (calls + 1, total + seconds)
+
+def count_cache(name, event):
+    # event is 'lookups' or 'misses'; hits are the difference
+    run = active_profile()
+    if run is not None:
+        counts = run['caches'].setdefault(name, {'lookups': 0, 'misses': 0})
+        counts[event] += 1
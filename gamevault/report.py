@@ -0,0 +1,141 @@
+# Batch report CLI: precomputes KPI snapshots and aggregate tables for many date ranges in parallel
+# and writes them to disk, where the dashboard picks them up (see gamevault.snapshots) and scheduled
+# e-mail reports can read them. Run from the folder that holds the CSV exports:
+#
+#   python -m gamevault.report                     # the whole range, every month, the last 7 and 30 days
+#   python -m gamevault.report --ranges all weekly --per-game --workers 8
+#   python -m gamevault.report --range 2027-09-01:2027-09-15
+#
+# Each snapshot is a folder named after its range and game, holding kpis.json (every KPI, read by the
+# dashboard) and one CSV per table. Uses GAMEVAULT_BACKEND like the dashboard.
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from .backends import DATA_BACKEND, LiveDataStore, open_backend
+from .kpis import KPIS
+from .loading import SOURCE_FILES
+from .rollups import (age_counts_by_year, build_revenue_series, game_play_counts, rating_counts_by_score,
+                      top_customer_spend, utilisation_by_weekday)
+from .snapshots import REPORTS_DIR, REPORTS_INDEX, SNAPSHOT_KPIS, data_signature, encode_kpi, kpi_key, snapshot_name
+
+# Aggregate tables written with every snapshot, next to the KPIs that are tables themselves:
+# table name -> (rollups it reads, function of the filtered rollups)
+REPORT_TABLES = {
+    'popular_games': (['gameplay'], game_play_counts),
+    'top_customers': (['customers'], lambda filtered: top_customer_spend(filtered, n=50, exact=True)),
+    'ratings': (['ratings'], rating_counts_by_score),
+    'ages': (['ages'], age_counts_by_year),
+    'utilisation': (['occupancy', 'gameplay'], utilisation_by_weekday),
+    'revenue_by_day': (['daily'], lambda filtered: build_revenue_series(filtered['daily'])),
+}
+
+def plan_ranges(first, last, kinds, trailing_days, custom):
+    # (label, start, end) for every requested date range
+    ranges = []
+    if 'all' in kinds:
+        ranges.append(("All dates", first, last))
+    # Periods are clipped to the recorded days: the dashboard's date picker cannot select past them,
+    # so a snapshot for a whole first or last week would never be read
+    def clipped(period):
+        return max(period.start_time, first), min(period.end_time.normalize(), last)
+    if 'monthly' in kinds:
+        for month in pd.period_range(first, last, freq='M'):
+            ranges.append((f"{month.start_time:%B %Y}", *clipped(month)))
+    if 'weekly' in kinds:
+        for week in pd.period_range(first, last, freq='W-SUN'):
+            ranges.append((f"Week of {week.start_time:%d %b %Y}", *clipped(week)))
+    for days in trailing_days:
+        ranges.append((f"Last {days} days", last - pd.Timedelta(days=days - 1), last))
+    for text in custom:
+        start, end = (pd.Timestamp(part) for part in text.split(':'))
+        ranges.append((f"{start:%d %b %Y} to {end:%d %b %Y}", start, end))
+    return ranges
+
+# --- Workers ---
+# Each worker process opens its own backend once, read-only: it serves the cache (or database) as the
+# parent left it. Syncing in every worker would append rows that arrived during the run once per
+# worker, to the same cache files and quarantine.
+_backend = None
+
+def open_worker_backend():
+    global _backend
+    _backend = open_backend(read_only=True)
+
+def write_snapshot(output_dir, label, start, end, game):
+    kpis = {}
+    for kpi, options in SNAPSHOT_KPIS:
+        names, compute = KPIS[kpi]
+        kpis[kpi_key(kpi, options)] = compute(_backend.filtered_rollups(start, end, game, names), **options)
+    tables = {name: compute(_backend.filtered_rollups(start, end, game, names))
+              for name, (names, compute) in REPORT_TABLES.items()}
+    tables.update({key: value for key, value in kpis.items() if isinstance(value, pd.DataFrame)})
+
+    name = snapshot_name(start, end, game)
+    directory = os.path.join(output_dir, name)
+    os.makedirs(directory, exist_ok=True)
+    meta = {'label': label, 'start': f"{start:%Y-%m-%d}", 'end': f"{end:%Y-%m-%d}", 'game': game}
+    with open(os.path.join(directory, 'kpis.json'), 'w') as f:
+        json.dump({**meta, 'kpis': {key: encode_kpi(value) for key, value in kpis.items()}}, f, indent=2)
+    for table_name, table in tables.items():
+        table.to_csv(os.path.join(directory, f"{table_name}.csv"), index=not isinstance(table.index, pd.RangeIndex))
+    return name, meta
+
+# --- Command Line ---
+def main():
+    parser = argparse.ArgumentParser(description="Precompute KPI snapshots and report tables for many date ranges.")
+    parser.add_argument('--ranges', nargs='*', choices=['all', 'monthly', 'weekly'], default=['all', 'monthly'])
+    parser.add_argument('--last', type=int, nargs='*', default=[7, 30], metavar='DAYS',
+                        help="trailing windows ending on the last recorded day (default: 7 30)")
+    parser.add_argument('--range', action='append', default=[], metavar='START:END',
+                        help="an extra date range, e.g. 2027-09-01:2027-09-15 (repeatable)")
+    parser.add_argument('--per-game', action='store_true', help="also write every range for each game")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', default=REPORTS_DIR, help=f"where to write the snapshots (default: {REPORTS_DIR})")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    # Taken before loading, so data appended during the run makes these snapshots stale, not wrong
+    signature = data_signature()
+    # Bring the on-disk cache (or the database) up to date once; the workers only read it
+    backend = open_backend()
+    if isinstance(backend, LiveDataStore):
+        backend.load(list(SOURCE_FILES))
+    first, last = backend.date_bounds()
+    games = ['All Games'] + (backend.games() if args.per_game else [])
+    # Ranges can coincide (a month of data is also its "All dates"); each is computed once, under its first label
+    tasks = {}
+    for label, start, end in plan_ranges(first, last, args.ranges, args.last, args.range):
+        for game in games:
+            tasks.setdefault(snapshot_name(start, end, game), (label, start, end, game))
+
+    index_path = os.path.join(args.output, REPORTS_INDEX)
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        index = {}
+    # Snapshots from an earlier run over the same data are kept alongside the new ones
+    snapshots = index.get('snapshots', {}) if (index.get('signature'), index.get('backend')) == (signature, DATA_BACKEND) else {}
+
+    os.makedirs(args.output, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=open_worker_backend) as pool:
+        futures = [pool.submit(write_snapshot, args.output, *task) for task in tasks.values()]
+        snapshots.update(future.result() for future in futures)
+
+    # Swapped in whole, so the dashboard never reads a half-written index
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'created': datetime.now().isoformat(timespec='seconds'), 'backend': DATA_BACKEND,
+                   'signature': signature, 'snapshots': snapshots}, f, indent=2)
+    os.replace(tmp_path, index_path)
+    print(f"Wrote {len(tasks)} snapshots to {args.output} in {time.perf_counter() - started:.1f} s "
+          f"({args.workers} workers, {DATA_BACKEND} backend)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,385 @@
+# Daily rollups of the preprocessed frames, the filters and aggregates KPIs and charts read from
+# them, and the revenue time series.
+import pandas as pd
+import numpy as np
+
+from .loading import SOURCE_FILES, WEEKDAYS, widen_floats
+from .profiling import profile_stage
+
+
+# --- 4c. Daily Rollups ---
+# KPIs and charts read from small per-day aggregates instead of the transaction log, so a rerun
+# slices a few hundred daily rows no matter how many visits are loaded. 'daily' is the revenue cube
+# (Date x Source x Game Played); the others keep the extra dimensions individual charts need.
+# Game Played is only set for visits and tournaments; other sources roll up under a missing game.
+# Rollups are grouped into families (ROLLUP_FAMILIES), each built from only the sources it reads,
+# so a page that needs no visit-level detail never loads or aggregates the visits.
+def build_revenue_rollups(frames):
+    visits, snacks, snooker, table_football, tournaments, expenses = (frames[source] for source in SOURCE_FILES)
+    activity = pd.concat([
+        pd.DataFrame({'Date': visits['Date'], 'Source': 'visits', 'Game Played': visits['Game Played'],
+                      'Amount': visits['Amount Paid (P)']}),
+        pd.DataFrame({'Date': snacks['Date'], 'Source': 'snacks', 'Amount': snacks['Total_Snack_Sale']}),
+        pd.DataFrame({'Date': snooker['Date'], 'Source': 'snooker', 'Amount': snooker['Amount (P)']}),
+        pd.DataFrame({'Date': table_football['Date'], 'Source': 'table_football', 'Amount': table_football['Amount (P)']}),
+        pd.DataFrame({'Date': tournaments['Date'], 'Source': 'tournaments', 'Game Played': tournaments['Game'],
+                      'Amount': tournaments['EntryFeePaid']}),
+        pd.DataFrame({'Date': expenses['Date'], 'Source': 'expenses', 'Amount': expenses['Amount (P)']}),
+    ], ignore_index=True)
+
+    daily = activity.groupby(['Date', 'Source', 'Game Played'], dropna=False, observed=True).agg(
+        Amount=('Amount', 'sum'),
+        Transactions=('Amount', 'size'),
+    ).reset_index()
+    return {'daily': daily}
+
+def build_gameplay_rollups(frames):
+    visits = frames['visits']
+    gameplay = visits.groupby(['Date', 'Game Played'], observed=True).agg(
+        Visits=('Amount Paid (P)', 'size'),
+        Duration=('Duration', 'sum'),
+        Timed=('Duration', 'count'),
+        Rating=('Rating (1-5)', 'sum'),
+    ).reset_index()
+    # Per-customer spend and visit counts per day, enough to answer unique-customer and top-customer queries
+    customers = visits.groupby(['Date', 'Game Played', 'CustomerID', 'Customer Name'], observed=True).agg(
+        Amount=('Amount Paid (P)', 'sum'),
+        Visits=('Amount Paid (P)', 'size'),
+    ).reset_index()
+    ratings = visits.groupby(['Date', 'Game Played', 'Rating (1-5)'], observed=True).size().reset_index(name='Visits')
+    ages = visits.groupby(['Date', 'Game Played', 'Age'], observed=True).size().reset_index(name='Visits')
+    occupancy = build_occupancy(visits['Date'], visits['Game Played'], visits['Time'], visits['Duration'])
+    customer_sketch, top_customers = build_customer_sketches(customers)
+    return {
+        'gameplay': gameplay,
+        'customers': customers,
+        'ratings': ratings,
+        'ages': ages,
+        'occupancy': occupancy,
+        'customer_sketch': customer_sketch,
+        'top_customers': top_customers,
+    }
+
+def build_snack_rollups(frames):
+    snack_sales = frames['snacks'].groupby(['Date', 'Snack'], observed=True).agg(
+        Quantity=('Quantity', 'sum'),
+        Amount=('Total_Snack_Sale', 'sum'),
+    ).reset_index()
+    return {'snacks': snack_sales}
+
+def build_tournament_rollups(frames):
+    tournaments = frames['tournaments'].rename(columns={'Game': 'Game Played'})
+    entries = tournaments.groupby(['Date', 'Game Played'], observed=True).agg(
+        Entries=('EntryFeePaid', 'size'),
+        Amount=('EntryFeePaid', 'sum'),
+    ).reset_index()
+    # Only placed entries; the export writes "None" for everyone else
+    placed = tournaments[tournaments['Position'].notna() & (tournaments['Position'] != 'None')]
+    podium = placed.groupby(['Date', 'Game Played', 'Position', 'CustomerID', 'Participant Name'],
+                            observed=True).size().reset_index(name='Entries')
+    return {'tournaments': entries, 'podium': podium}
+
+def build_expense_rollups(frames):
+    expense_categories = frames['expenses'].groupby(['Date', 'Expense Category'], observed=True)['Amount (P)'].sum().reset_index()
+    return {'expenses': expense_categories}
+
+# Family -> (sources it reads, rollups it produces, builder)
+ROLLUP_FAMILIES = {
+    'revenue': (list(SOURCE_FILES), ['daily'], build_revenue_rollups),
+    'gameplay': (['visits'], ['gameplay', 'customers', 'ratings', 'ages', 'occupancy', 'customer_sketch', 'top_customers'],
+                 build_gameplay_rollups),
+    'snacks': (['snacks'], ['snacks'], build_snack_rollups),
+    'tournaments': (['tournaments'], ['tournaments', 'podium'], build_tournament_rollups),
+    'expenses': (['expenses'], ['expenses'], build_expense_rollups),
+}
+ROLLUP_FAMILY = {name: family for family, (_, names, _) in ROLLUP_FAMILIES.items() for name in names}
+
+def rollup_families(names):
+    return [family for family in ROLLUP_FAMILIES if any(ROLLUP_FAMILY[name] == family for name in names)]
+
+def build_daily_rollups(frames, families=tuple(ROLLUP_FAMILIES)):
+    # frames must hold every source the requested families read
+    frames = {source: widen_floats(df) for source, df in frames.items()}
+    rollups = {}
+    for family in families:
+        with profile_stage(f"rollups: {family}"):
+            rollups.update(ROLLUP_FAMILIES[family][2](frames))
+    return {name: df.sort_values('Date', kind='stable', ignore_index=True) for name, df in rollups.items()}
+
+# Station occupancy: how many visits are in progress during each 15-minute slot of each day.
+# A visit occupies every slot it overlaps, from its start slot up to the slot its end falls in.
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+def build_occupancy(dates, games, start_minutes, durations):
+    # Sweep line instead of expanding visits into per-minute rows: every visit adds +1 at its first
+    # slot and -1 after its last one on a per-game timeline of absolute slots, and a cumulative sum
+    # turns those events into concurrent visits per slot. Work is O(visits + games x slots in range).
+    # Visits running past midnight simply continue into the next day's slots.
+    # Rows: Date, Game Played, Slot (0..SLOTS_PER_DAY-1), Stations, for occupied slots only.
+    timed = dates.notna() & games.notna() & start_minutes.notna() & durations.gt(0)
+    if not timed.any():
+        return pd.DataFrame({'Date': pd.Series(dtype='datetime64[ns]'), 'Game Played': pd.Series(dtype='category'),
+                             'Slot': pd.Series(dtype='int16'), 'Stations': pd.Series(dtype='int32')})
+    dates, games = dates[timed], games[timed]
+    start = start_minutes[timed].to_numpy(dtype='float64')
+    end = start + durations[timed].to_numpy(dtype='float64')
+
+    first_day = dates.min()
+    day_numbers = ((dates - first_day) // pd.Timedelta(days=1)).to_numpy()
+    first_slot = day_numbers * SLOTS_PER_DAY + (start // SLOT_MINUTES).astype('int64')
+    stop_slot = day_numbers * SLOTS_PER_DAY + np.ceil(end / SLOT_MINUTES).astype('int64')
+
+    game_codes, game_names = pd.factorize(games)
+    span = int(stop_slot.max()) + 1
+    events = np.bincount(game_codes * span + first_slot, minlength=len(game_names) * span)
+    events -= np.bincount(game_codes * span + stop_slot, minlength=len(game_names) * span)
+    stations = events.reshape(len(game_names), span).cumsum(axis=1)
+
+    game_index, slot_index = np.nonzero(stations)
+    return pd.DataFrame({
+        'Date': first_day + pd.to_timedelta(slot_index // SLOTS_PER_DAY, unit='D'),
+        'Game Played': pd.Categorical.from_codes(game_index, categories=np.asarray(game_names)),
+        'Slot': (slot_index % SLOTS_PER_DAY).astype('int16'),
+        'Stations': stations[game_index, slot_index].astype('int32'),
+    })
+
+# Customer sketches: fixed-size per-day summaries that answer "how many distinct customers" and
+# "who spent most" for any date range by merging one small summary per day, instead of grouping
+# every (day, customer) row of the range. Games and snacks need no sketch: their vocabularies are
+# small and closed, so the exact per-day rollups above are already bounded in size.
+#   - HyperLogLog registers per (Date, Game Played) for distinct CustomerID (~3% standard error;
+#     near exact for small counts via linear counting). Ranges merge by element-wise max.
+#   - A top-k summary per (Date, Game Played): the day's TOP_K_CAPACITY biggest spenders, plus the
+#     largest spend left out ('Dropped'). Ranges merge by summing; any customer's true range total
+#     is at most the merged estimate plus the summed 'Dropped' bound, which the dashboard shows
+#     next to the approximate answer (see top_customer_spend_with_bound()).
+HLL_PRECISION = 10
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_HASH_BITS = 52  # hash bits after the register index; kept below float64's 53-bit mantissa
+TOP_K_CAPACITY = 50
+
+def hll_ranks(customer_ids):
+    # Register index and rank (position of the first set bit) of each ID's 64-bit hash. hash_array
+    # hashes the raw bits, so IDs are cast to int64 first: a batch whose IDs were read as int8 or as
+    # floats must land its customers in the same registers as every other batch.
+    hashes = pd.util.hash_array(np.asarray(customer_ids, dtype='int64'))
+    registers = (hashes >> np.uint64(64 - HLL_PRECISION)).astype('int64')
+    remainder = (hashes & np.uint64((1 << HLL_HASH_BITS) - 1)).astype('float64')
+    bit_length = np.frexp(remainder)[1]
+    return registers, (HLL_HASH_BITS - bit_length + 1).astype('uint8')
+
+def hll_estimate(registers):
+    # Standard HyperLogLog estimate with the small-range (linear counting) correction
+    registers = registers.astype('float64')
+    alpha = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+    estimate = alpha * HLL_REGISTERS ** 2 / np.exp2(-registers).sum()
+    empty = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * HLL_REGISTERS and empty:
+        estimate = HLL_REGISTERS * np.log(HLL_REGISTERS / empty)
+    return estimate
+
+def merge_registers(values):
+    # Union of HyperLogLog sketches stored as bytes
+    stacked = np.frombuffer(b''.join(values), dtype='uint8').reshape(-1, HLL_REGISTERS)
+    return stacked.max(axis=0).tobytes()
+
+def build_customer_sketches(customers):
+    # customers: the per-day customer rollup (Date, Game Played, CustomerID, Customer Name, Amount)
+    keys = ['Date', 'Game Played']
+    groups = customers.groupby(keys, observed=True, sort=False)
+    sketch = groups.size().reset_index()[keys]
+    codes = groups.ngroup().to_numpy()
+    registers, ranks = hll_ranks(customers['CustomerID'])  # never missing: the groupby drops them
+    matrix = np.zeros((len(sketch), HLL_REGISTERS), dtype='uint8')
+    np.maximum.at(matrix, (codes, registers), ranks)
+    sketch['Registers'] = [row.tobytes() for row in matrix]
+
+    # Rank customers by spend within each day and game; keep the top k and remember the best one dropped
+    spend = customers.groupby(keys + ['CustomerID', 'Customer Name'], observed=True)['Amount'].sum().reset_index()
+    spend = spend.sort_values('Amount', ascending=False, kind='stable')
+    rank = spend.groupby(keys, observed=True).cumcount()
+    dropped = spend[rank >= TOP_K_CAPACITY].groupby(keys, observed=True)['Amount'].max()
+    sketch['Dropped'] = dropped.reindex(pd.MultiIndex.from_frame(sketch[keys]), fill_value=0).to_numpy()
+    return sketch, spend[rank < TOP_K_CAPACITY]
+
+def build_date_index(df):
+    # For a Date-sorted frame: the distinct days plus the row offset where each day starts,
+    # with a trailing offset equal to len(df). Missing dates (NaT) sort last and are never selected.
+    days, offsets = np.unique(df['Date'].to_numpy(), return_index=True)
+    return days, np.append(offsets, len(df))
+
+def slice_dates(df, date_index, start, end):
+    # Binary search on the day index instead of a full boolean mask; iloc row ranges are views, not copies
+    days, offsets = date_index
+    lo = offsets[np.searchsorted(days, start.to_datetime64(), side='left')]
+    hi = offsets[np.searchsorted(days, end.to_datetime64(), side='right')]
+    return df.iloc[lo:hi]
+
+# Rollups that carry a Game Played column and therefore follow the sidebar game filter
+GAME_ROLLUPS = ['gameplay', 'customers', 'ratings', 'ages', 'occupancy', 'customer_sketch', 'top_customers']
+
+def filter_rollups(rollups, date_indexes, start, end, game):
+    filtered = {name: slice_dates(df, date_indexes[name], start, end) for name, df in rollups.items()}
+    if game != 'All Games':
+        # The game filter only narrows gameplay (visits); other revenue streams are unaffected
+        if 'daily' in filtered:
+            daily = filtered['daily']
+            filtered['daily'] = daily[(daily['Source'] != 'visits') | (daily['Game Played'] == game)]
+        for name in GAME_ROLLUPS:
+            if name in filtered:
+                df = filtered[name]
+                filtered[name] = df[df['Game Played'] == game]
+    return filtered
+
+# Chart and KPI inputs, each a small aggregate of the filtered rollups
+def game_play_counts(filtered):
+    return filtered['gameplay'].groupby('Game Played', observed=True)['Visits'].sum()
+
+def unique_customer_count(filtered, exact=False):
+    # Backends without sketch rollups (SQLite pushes these aggregates down) always answer exactly
+    if exact or 'customer_sketch' not in filtered:
+        return filtered['customers']['CustomerID'].nunique()
+    sketches = filtered['customer_sketch']['Registers']
+    return round(hll_estimate(np.frombuffer(merge_registers(sketches), dtype='uint8'))) if len(sketches) else 0
+
+def top_customer_spend(filtered, n=10, exact=False):
+    return top_customer_spend_with_bound(filtered, n, exact)[0]
+
+def top_customer_spend_with_bound(filtered, n=10, exact=False):
+    # The top n spenders and how much any shown total can fall short of the true one (0 when exact).
+    # Grouped on CustomerID because names are not unique; the label keeps the ID visible. Unless exact,
+    # the top-k sketches answer in time bounded by the number of days: their totals are lower bounds,
+    # each short by at most the summed 'Dropped' bound, which the caller shows with the answer.
+    if exact or 'top_customers' not in filtered or 'customer_sketch' not in filtered:
+        customers, bound = filtered['customers'], 0
+    else:
+        customers = filtered['top_customers']
+        bound = float(filtered['customer_sketch']['Dropped'].sum())
+    spend = customers.groupby('CustomerID', observed=True)['Amount'].sum().nlargest(n)
+    names = customers.drop_duplicates('CustomerID', keep='last').set_index('CustomerID')['Customer Name']
+    labels = names.reindex(spend.index).astype('string') + ' (#' + spend.index.astype('string') + ')'
+    return pd.DataFrame({'Customer Name': labels.to_numpy(), 'Amount Paid (P)': spend.to_numpy()}), bound
+
+def expense_totals(filtered):
+    return filtered['expenses'].groupby('Expense Category', observed=True)['Amount (P)'].sum().reset_index()
+
+def snack_quantities_by_type(filtered):
+    return filtered['snacks'].groupby('Snack', observed=True)['Quantity'].sum()
+
+def snack_sales_by_type(filtered):
+    sales = filtered['snacks'].groupby('Snack', observed=True)[['Quantity', 'Amount']].sum()
+    sales['Avg. Price (P)'] = sales['Amount'] / sales['Quantity'].where(sales['Quantity'] != 0)
+    return sales.sort_values('Quantity', ascending=False).reset_index()
+
+def tournament_entries_by_game(filtered):
+    return filtered['tournaments'].groupby('Game Played', observed=True)[['Entries', 'Amount']].sum().reset_index()
+
+def expenses_by_day(filtered):
+    return filtered['expenses'].groupby(['Date', 'Expense Category'], observed=True)['Amount (P)'].sum().reset_index()
+
+def rating_counts_by_score(filtered):
+    return filtered['ratings'].groupby('Rating (1-5)')['Visits'].sum().reset_index(name='Count')
+
+def age_counts_by_year(filtered):
+    return filtered['ages'].groupby('Age')['Visits'].sum().reset_index()
+
+def stations_by_slot(filtered):
+    # Concurrent visits per (Date, Slot) across the selected games
+    return filtered['occupancy'].groupby(['Date', 'Slot'])['Stations'].sum()
+
+def peak_load(filtered):
+    # Highest number of simultaneously occupied stations, with the day and slot it first happened
+    stations = stations_by_slot(filtered)
+    if stations.empty:
+        return 0, None, None
+    date, slot = stations.idxmax()
+    return int(stations.max()), date, slot
+
+def slot_label(slot):
+    return f"{slot * SLOT_MINUTES // 60:02d}:{slot * SLOT_MINUTES % 60:02d}"
+
+def utilisation_by_weekday(filtered):
+    # Average occupied stations per Day of Week x 15-minute slot, over the days with visits in the
+    # range (days without visits in a slot count as zero). Columns span the slots that were ever
+    # occupied, so closed hours do not stretch the heatmap.
+    stations = stations_by_slot(filtered)
+    if stations.empty:
+        return pd.DataFrame()
+    open_days = pd.Series(filtered['gameplay']['Date'].unique())
+    days_per_weekday = open_days.dt.day_name().value_counts()
+    totals = stations.reset_index()
+    totals['Day of Week'] = totals['Date'].dt.day_name()
+    grid = totals.pivot_table(index='Day of Week', columns='Slot', values='Stations', aggfunc='sum', fill_value=0)
+    grid = grid.div(days_per_weekday.reindex(grid.index), axis=0)
+    grid = grid.reindex(index=[day for day in WEEKDAYS if day in days_per_weekday],
+                        columns=range(grid.columns.min(), grid.columns.max() + 1), fill_value=0)
+    grid.columns = [slot_label(slot) for slot in grid.columns]
+    return grid
+
+# Key columns of each rollup; every other column is a mergeable measure (a sum or a count unless in ROLLUP_MERGES)
+ROLLUP_KEYS = {
+    'daily': ['Date', 'Source', 'Game Played'],
+    'gameplay': ['Date', 'Game Played'],
+    'customers': ['Date', 'Game Played', 'CustomerID', 'Customer Name'],
+    'ratings': ['Date', 'Game Played', 'Rating (1-5)'],
+    'ages': ['Date', 'Game Played', 'Age'],
+    'snacks': ['Date', 'Snack'],
+    'expenses': ['Date', 'Expense Category'],
+    'occupancy': ['Date', 'Game Played', 'Slot'],
+    'customer_sketch': ['Date', 'Game Played'],
+    'top_customers': ['Date', 'Game Played', 'CustomerID', 'Customer Name'],
+    'tournaments': ['Date', 'Game Played'],
+    'podium': ['Date', 'Game Played', 'Position', 'CustomerID', 'Participant Name'],
+}
+
+# Measures that do not merge by summing
+ROLLUP_MERGES = {'Registers': merge_registers}
+
+def merge_rollups(rollups, date_indexes, new_rollups):
+    # Fold rollups of newly ingested rows into the existing ones. Because all measures merge per key
+    # (sums, or ROLLUP_MERGES for sketches), only the days from the earliest new row onwards are
+    # re-aggregated; older days are reused as-is.
+    merged = dict(rollups)
+    for name, new in new_rollups.items():
+        if new.empty:
+            continue
+        df = rollups[name]
+        days, offsets = date_indexes[name]
+        first_new_day = offsets[np.searchsorted(days, new['Date'].min().to_datetime64(), side='left')]
+        recent = pd.concat([df.iloc[first_new_day:], new], ignore_index=True)
+        measures = {column: ROLLUP_MERGES.get(column, 'sum') for column in recent.columns if column not in ROLLUP_KEYS[name]}
+        recent = recent.groupby(ROLLUP_KEYS[name], dropna=False, observed=True).agg(measures).reset_index()
+        merged[name] = pd.concat([df.iloc[:first_new_day], recent], ignore_index=True)
+    return merged
+
+def index_rollups(rollups):
+    return {name: build_date_index(df) for name, df in rollups.items()}
+
+# --- 4d. Revenue Time Series ---
+# All revenue streams come out of the daily cube in one long-format pass: a single pivot gives one
+# column per stream, which is then resampled to the requested resolution and totalled.
+REVENUE_STREAMS = {
+    'visits': 'Gameplay Revenue',
+    'snacks': 'Snack Revenue',
+    'snooker': 'Snooker Revenue',
+    'table_football': 'Table Football Revenue',
+    'tournaments': 'Tournament Revenue',
+}
+
+REVENUE_RESOLUTIONS = {'Daily': 'D', 'Weekly': 'W-SUN', 'Monthly': 'MS'}
+
+def build_revenue_series(daily, resolution='Daily'):
+    revenue = daily[daily['Source'].isin(list(REVENUE_STREAMS))]
+    if revenue.empty:
+        columns = list(REVENUE_STREAMS.values()) + ['Total Revenue']
+        return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name='Date'), dtype='float')
+
+    series = revenue.pivot_table(index='Date', columns='Source', values='Amount',
+                                 aggfunc='sum', fill_value=0, observed=True)
+    series = series.reindex(columns=list(REVENUE_STREAMS), fill_value=0)
+
+    series = series.resample(REVENUE_RESOLUTIONS[resolution]).sum().rename(columns=REVENUE_STREAMS)
+    series['Total Revenue'] = series.sum(axis=1)
+    series.columns.name = None
+    return series
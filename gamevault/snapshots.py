@@ -0,0 +1,127 @@
+# KPI snapshots written by the report CLI (python -m gamevault.report) and read back by the dashboard.
+import hashlib
+import io
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .backends import DATA_BACKEND
+from .loading import (CACHE_VERSION, DATA_DIR, DUPLICATE_KEYS, SOURCE_FILES, VALIDATION_CHECKS, batch_files,
+                      file_signature)
+from .rollups import HLL_PRECISION, SLOT_MINUTES, TOP_K_CAPACITY
+
+# A snapshot holds the KPIs below for one date range and game, exactly as the dashboard would compute
+# them with the same backend, plus CSV tables for e-mail reports. The index records the backend and
+# the signature of the source files and preprocessing the snapshots were computed from; once either
+# differs, the snapshots are ignored and KPIs are computed live again.
+REPORTS_DIR = os.environ.get('GAMEVAULT_REPORTS', os.path.join(DATA_DIR, 'reports'))
+REPORTS_INDEX = 'index.json'
+# Bump whenever a KPI or rollup in kpis.py or rollups.py changes meaning, so that snapshots computed
+# the old way are not served as current
+SNAPSHOT_VERSION = 1
+
+# (KPI name, options) pairs as the pages request them
+SNAPSHOT_KPIS = [
+    ('revenue', {}),
+    ('gameplay', {}),
+    ('unique_customers', {'exact': False}),
+    ('unique_customers', {'exact': True}),
+    ('peak_load', {}),
+    ('snack_sales', {}),
+    ('tournament_entries', {}),
+    ('podium', {}),
+    ('expense_totals', {}),
+]
+
+def kpi_key(kpi, options):
+    return kpi + "".join(f"|{name}={value}" for name, value in sorted(options.items()))
+
+# KPIs are stored as JSON rather than pickles, so reading a snapshot never runs code from the reports
+# folder. Tables, tuples, dicts and timestamps are tagged so decode_kpi() gives back what the KPI
+# function returned.
+def encode_kpi(value):
+    if isinstance(value, pd.DataFrame):
+        return {'table': json.loads(value.to_json(orient='table', index=False, date_format='iso'))}
+    if isinstance(value, tuple):
+        return {'tuple': [encode_kpi(item) for item in value]}
+    if isinstance(value, dict):
+        return {'dict': {key: encode_kpi(item) for key, item in value.items()}}
+    if isinstance(value, pd.Timestamp):
+        return {'timestamp': value.isoformat()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    raise TypeError(f"cannot store a {type(value).__name__} in a KPI snapshot")
+
+def decode_kpi(value):
+    if not isinstance(value, dict):
+        return value
+    (tag, content), = value.items()
+    if tag == 'table':
+        return pd.read_json(io.StringIO(json.dumps(content)), orient='table')
+    if tag == 'tuple':
+        return tuple(decode_kpi(item) for item in content)
+    if tag == 'dict':
+        return {key: decode_kpi(item) for key, item in content.items()}
+    return pd.Timestamp(content)
+
+def snapshot_name(start, end, game):
+    slug = "".join(char if char.isalnum() else "-" for char in game.lower())
+    return f"{start:%Y-%m-%d}_{end:%Y-%m-%d}_{slug}"
+
+def data_signature():
+    # Changes whenever a source CSV or an incoming batch file changes (the same stat() check as 4b),
+    # and, like the on-disk cache, whenever CACHE_VERSION or the validation rules change, so that
+    # snapshots computed by older preprocessing are not served after an upgrade. SNAPSHOT_VERSION and
+    # the sketch and occupancy parameters do the same for the KPI and rollup code.
+    files = {name: file_signature(os.path.join(DATA_DIR, name)) for name in SOURCE_FILES.values()}
+    for source in SOURCE_FILES:
+        files.update(batch_files(source))
+    rules = {source: [reason for reason, _ in checks] + [DUPLICATE_KEYS.get(source, 'no duplicate check')]
+             for source, checks in VALIDATION_CHECKS.items()}
+    code = {'snapshot_version': SNAPSHOT_VERSION, 'hll_precision': HLL_PRECISION, 'top_k_capacity': TOP_K_CAPACITY,
+            'slot_minutes': SLOT_MINUTES}
+    signature = {'files': files, 'cache_version': CACHE_VERSION, 'validation': rules, 'code': code}
+    return hashlib.sha1(json.dumps(signature, sort_keys=True).encode()).hexdigest()
+
+class SnapshotStore:
+    # The index is re-read whenever the report CLI replaces it; loaded snapshots are kept until then
+    def __init__(self, directory=REPORTS_DIR, backend=DATA_BACKEND):
+        self.directory = directory
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.index_stamp = None
+        self.index = {}
+        self.loaded = {}
+
+    def current_index(self):
+        path = os.path.join(self.directory, REPORTS_INDEX)
+        try:
+            stamp = file_signature(path)
+        except FileNotFoundError:
+            return {}
+        with self.lock:
+            if stamp != self.index_stamp:
+                with open(path) as f:
+                    self.index = json.load(f)
+                self.index_stamp = stamp
+                self.loaded = {}
+            return self.index
+
+    def kpi(self, kpi, start, end, game='All Games', **options):
+        # Returns None when there is no current snapshot for this range, game and KPI
+        index = self.current_index()
+        name = snapshot_name(start, end, game)
+        if name not in index.get('snapshots', {}) or index['backend'] != self.backend \
+                or index['signature'] != data_signature():
+            return None
+        with self.lock:
+            if name not in self.loaded:
+                with open(os.path.join(self.directory, name, 'kpis.json')) as f:
+                    self.loaded[name] = json.load(f)['kpis']
+            key = kpi_key(kpi, options)
+            return decode_kpi(self.loaded[name][key]) if key in self.loaded[name] else None
@@ -0,0 +1,202 @@
+# Unit tests for the gamevault core: parsing, validation, incremental ingestion, rollups, sketches and
+# KPI snapshots. Tests that touch the on-disk cache run on a copy of the sample data.
+import glob
+import json
+import os
+import shutil
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from gamevault import loading, rollups
+from gamevault.backends import LiveDataStore, SQLiteBackend
+from gamevault.kpis import KPIS
+from gamevault.snapshots import SNAPSHOT_KPIS, decode_kpi, encode_kpi
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    # The cache, manifest and quarantine paths are relative to the working directory
+    for path in glob.glob(os.path.join(APP_DIR, '*_2027.csv')):
+        shutil.copy(path, tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def visit(customer=1, name='Tumelo', game='FC25', date='9/1/2027', amount=20, duration='1 hour', start='15:00',
+          rating=4, age=25):
+    # One raw visits row, as read from the CSV export
+    return {'CustomerID': customer, 'Name': name, 'Age': age, 'Game Played': game, 'Date': date,
+            'Amount Paid (P)': amount, 'Duration': duration, 'Start Time': start, 'Rating (1-5)': rating}
+
+def append_lines(name, lines):
+    with open(name, 'a') as f:
+        f.write(''.join(line + '\n' for line in lines))
+
+def sorted_rollup(df):
+    return df.sort_values([column for column in df.columns if column != 'Registers']).reset_index(drop=True)
+
+
+# --- Parsing & validation ---
+def test_parse_durations():
+    spellings = pd.Series(['1 hour', '30 mins', '1.5 hours', '1h 30m', '1:30', '45', ' 2 HOURS ', '-30 mins',
+                           'soon', None])
+    parsed = loading.parse_durations(spellings)
+    expected = [60, 30, 90, 90, 90, 45, 120, -30, np.nan, np.nan]
+    np.testing.assert_array_equal(parsed.to_numpy(), np.array(expected, dtype='float64'))
+
+def test_validate_rows_quarantines_bad_visits():
+    raw = pd.DataFrame([visit(), visit(duration='0 mins'), visit(rating=7), visit(age=None), visit(customer=None),
+                        visit(game=None), visit(amount=-5), visit(start='late')])
+    df, _, quarantined = loading.preprocess_rows('visits', raw)
+    assert len(df) == 1
+    assert quarantined['Reason'].tolist() == [
+        'zero or negative Duration', 'Rating (1-5) outside 1-5', 'missing or unreadable Age',
+        'missing or unreadable CustomerID', 'missing or unreadable Game Played', 'negative Amount Paid (P)',
+        'missing or unreadable Start Time',
+    ]
+
+def test_duplicate_rows_against_stored_rows():
+    stored, _, _ = loading.preprocess_rows('visits', pd.DataFrame([visit(), visit(customer=2, date='9/2/2027')]))
+    # Same visit spelled differently, a repeat within the batch, and a new visit on a stored day
+    batch = pd.DataFrame([visit(duration='60 mins'), visit(customer=3), visit(customer=3),
+                          visit(customer=2, date='9/1/2027')])
+    df, _, quarantined = loading.preprocess_rows('visits', batch, lambda dates: loading.rows_on_dates(stored, dates))
+    assert df['CustomerID'].tolist() == [3, 2]
+    assert quarantined['Reason'].tolist() == ['duplicate row', 'duplicate row']
+    # Without the stored rows only the repeat within the batch is caught
+    assert len(loading.preprocess_rows('visits', batch)[2]) == 1
+
+def test_malformed_or_negative_snack_total():
+    raw = pd.DataFrame({'CustomerID': [1, 2, 3], 'Date': ['9/1/2027'] * 3, 'Snack Type': ['Raisins'] * 3,
+                        'Quantity': [2, 1, 1], 'Unit Price': [5, 5, 5], 'Total Price': ['10', 'abc', '-500']})
+    df, _, quarantined = loading.preprocess_rows('snacks', raw)
+    assert pd.api.types.is_float_dtype(df['Total_Snack_Sale'])
+    assert df['Total_Snack_Sale'].tolist() == [10]
+    assert quarantined['Reason'].tolist() == ['missing or unreadable Total Price', 'negative Total Price']
+
+
+# --- Incremental ingestion ---
+def test_incremental_sync_matches_rebuild(data_dir):
+    lines = open('Visits_2027.csv').read().splitlines()
+    with open('Visits_2027.csv', 'w') as f:
+        f.write('\n'.join(lines[:1000]) + '\n')
+    store = LiveDataStore()
+    store.rollups(['daily', 'customer_sketch'])
+    # The rest of the month, a repeat of a row ingested earlier, and a row with a blank customer ID
+    blank_id = ',' + lines[1].split(',', 1)[1]
+    append_lines('Visits_2027.csv', lines[1000:] + [lines[10], blank_id])
+    assert store.refresh()
+    incremental, quarantine = store.snapshot[0], loading.read_quarantine('visits')
+
+    shutil.rmtree(loading.CACHE_DIR)
+    rebuilt = LiveDataStore()
+    rebuilt.rollups(['daily', 'customer_sketch'])
+    pd.testing.assert_frame_equal(store.frames['visits'], rebuilt.frames['visits'], check_categorical=False)
+    # Raw values are compared as numbers: a batch holding a blank ID reads the other IDs as floats
+    rebuilt_quarantine = loading.read_quarantine('visits')
+    assert quarantine['Reason'].tolist() == rebuilt_quarantine['Reason'].tolist()
+    assert [json.loads(row) for row in quarantine['Row']] == [json.loads(row) for row in rebuilt_quarantine['Row']]
+    for name in ['daily', 'customers', 'customer_sketch']:
+        pd.testing.assert_frame_equal(sorted_rollup(incremental[name]), sorted_rollup(rebuilt.snapshot[0][name]),
+                                      check_categorical=False)
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_touched_file_is_not_hashed_again(data_dir, monkeypatch, backend):
+    store = LiveDataStore() if backend == 'csv' else SQLiteBackend('gamevault.db')
+    if backend == 'csv':
+        store.load(['visits'])
+    os.utime('Visits_2027.csv', ns=(0, 0))
+    assert not store.refresh()
+
+    def fail(path):
+        raise AssertionError(f"{path} hashed again")
+    monkeypatch.setattr(loading, 'file_hash', fail)
+    assert not store.refresh()
+    if backend == 'csv':
+        LiveDataStore().load(['visits'])
+    else:
+        SQLiteBackend('gamevault.db')
+
+
+# --- Rollups & sketches ---
+def test_build_occupancy_matches_brute_force():
+    rng = np.random.default_rng(7)
+    count = 500
+    visits = pd.DataFrame({
+        'Date': pd.Timestamp('2027-09-01') + pd.to_timedelta(rng.integers(0, 4, count), unit='D'),
+        'Game Played': rng.choice(['FC25', 'Tekken 8', 'WWE 2K25'], count),
+        # Late starts run past midnight into the next day's slots
+        'Time': pd.Series(rng.integers(0, 24 * 60, count), dtype='Int16'),
+        'Duration': rng.choice([15.0, 30.0, 45.0, 60.0, 90.0, 150.0, np.nan, 0.0], count),
+    })
+    occupancy = rollups.build_occupancy(visits['Date'], visits['Game Played'], visits['Time'], visits['Duration'])
+
+    expected = Counter()
+    for row in visits.itertuples():
+        if not row.Duration > 0:
+            continue
+        first = row.Time // rollups.SLOT_MINUTES
+        stop = int(np.ceil((row.Time + row.Duration) / rollups.SLOT_MINUTES))
+        for slot in range(first, stop):
+            day = row.Date + pd.Timedelta(days=slot // rollups.SLOTS_PER_DAY)
+            expected[(day, row._2, slot % rollups.SLOTS_PER_DAY)] += 1
+    actual = {(row.Date, row._2, row.Slot): row.Stations for row in occupancy.itertuples()}
+    assert actual == dict(expected)
+
+@pytest.mark.parametrize('count', [50, 5_000, 200_000])
+def test_hll_error(count):
+    registers, ranks = rollups.hll_ranks(np.arange(count) * 7919)
+    sketch = np.zeros(rollups.HLL_REGISTERS, dtype='uint8')
+    np.maximum.at(sketch, registers, ranks)
+    # Three standard errors of a 1024-register sketch (1.04 / sqrt(1024) ~ 3.3%)
+    assert abs(rollups.hll_estimate(sketch) - count) <= 0.1 * count
+
+def test_hll_ranks_ignore_id_dtype():
+    as_int8 = rollups.hll_ranks(pd.Series([5, 6, 120], dtype='int8'))
+    as_float = rollups.hll_ranks(pd.Series([5.0, 6.0, 120.0]))
+    for int_values, float_values in zip(as_int8, as_float):
+        np.testing.assert_array_equal(int_values, float_values)
+
+def test_top_k_bound():
+    rng = np.random.default_rng(3)
+    count = 20_000
+    customers = pd.DataFrame({
+        'Date': pd.Timestamp('2027-09-01') + pd.to_timedelta(rng.integers(0, 10, count), unit='D'),
+        'Game Played': 'FC25',
+        'CustomerID': rng.integers(0, 400, count),
+        'Customer Name': 'Player',
+        'Amount': rng.integers(1, 30, count) * 10.0,
+    }).groupby(['Date', 'Game Played', 'CustomerID', 'Customer Name']).sum().reset_index()
+    sketch, top = rollups.build_customer_sketches(customers)
+    filtered = {'customers': customers, 'customer_sketch': sketch, 'top_customers': top}
+
+    bound = sketch['Dropped'].sum()
+    assert bound > 0
+    true = customers.groupby('CustomerID')['Amount'].sum()
+    estimates = top.groupby('CustomerID')['Amount'].sum().reindex(true.index, fill_value=0)
+    assert (estimates <= true).all() and (true <= estimates + bound).all()
+
+    approximate, shown_bound = rollups.top_customer_spend_with_bound(filtered, n=10)
+    exact, exact_bound = rollups.top_customer_spend_with_bound(filtered, n=10, exact=True)
+    assert (shown_bound, exact_bound) == (bound, 0)
+    assert (approximate['Amount Paid (P)'].to_numpy() <= exact['Amount Paid (P)'].to_numpy()).all()
+    assert (exact['Amount Paid (P)'].to_numpy() <= approximate['Amount Paid (P)'].to_numpy() + bound).all()
+
+
+# --- KPI snapshots ---
+def test_kpi_snapshot_round_trip(data_dir):
+    store = LiveDataStore()
+    start, end = store.date_bounds()
+    for kpi, options in SNAPSHOT_KPIS:
+        names, compute = KPIS[kpi]
+        value = compute(store.filtered_rollups(start, end, 'All Games', names), **options)
+        decoded = decode_kpi(json.loads(json.dumps(encode_kpi(value))))
+        if isinstance(value, pd.DataFrame):
+            # JSON keeps values and column types, not the exact datetime unit or categorical dtypes
+            pd.testing.assert_frame_equal(decoded, value.reset_index(drop=True), check_dtype=False,
+                                          check_categorical=False)
+        else:
+            assert decoded == value, kpi
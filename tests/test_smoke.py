@@ -0,0 +1,54 @@
+# AppTest smoke tests: every page renders without an exception on the sample data, including filter
+# states that leave charts empty (their placeholders are drawn from cached figure dicts too).
+import datetime
+import glob
+import os
+import shutil
+
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ['views/overview.py', 'views/revenue.py', 'views/customers.py', 'views/snacks.py',
+         'views/tournaments.py', 'views/expenses.py', 'views/data_quality.py']
+
+# A day with visits but no tournaments or expenses, and a game nobody played on it
+EMPTY_DAY = datetime.date(2027, 9, 2)
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # The app reads the CSVs (and writes its cache) in the working directory, so it runs on a copy
+    for path in glob.glob(os.path.join(APP_DIR, '*_2027.csv')):
+        shutil.copy(path, tmp_path)
+    monkeypatch.chdir(tmp_path)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(os.path.join(APP_DIR, 'Dashboard.py'), default_timeout=60)
+    at.run()
+    return at
+
+def render(at, page):
+    at.switch_page(page)
+    at.run()
+    assert not at.exception, [exception.value for exception in at.exception]
+
+@pytest.mark.parametrize('page', PAGES)
+def test_page_renders(app, page):
+    render(app, page)
+
+@pytest.mark.parametrize('page', PAGES)
+def test_page_renders_empty_range(app, page):
+    app.sidebar.date_input[0].set_value((EMPTY_DAY, EMPTY_DAY)).run()
+    render(app, page)
+
+def test_top_customers_without_matching_visits(app):
+    app.sidebar.date_input[0].set_value((EMPTY_DAY, EMPTY_DAY)).run()
+    for game in app.sidebar.selectbox[0].options[1:]:
+        app.sidebar.selectbox[0].set_value(game).run()
+        render(app, 'views/overview.py')
+
+def test_revenue_trend_without_streams(app):
+    render(app, 'views/revenue.py')
+    app.multiselect[0].set_value([]).run()
+    assert not app.exception, [exception.value for exception in app.exception]
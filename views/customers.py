@@ -0,0 +1,95 @@
+import streamlit as st
+
+from common import (current_filters, customer_analytics, kpi_card, page_fragment, page_kpi, render_customer_figure,
+                    render_figure, untimed_visits_caption)
+from gamevault.rollups import slot_label
+
+# --- Customers: visits, feedback, demographics, utilisation and customer analytics ---
+filters = current_filters()
+
+st.subheader("Customers & Visits")
+
+@page_fragment("Visit KPIs", depends_on=('start', 'end', 'game', 'exact'))
+def visit_kpis(scope):
+    gameplay = page_kpi('gameplay', scope)
+    col1, col2, col3, col4 = st.columns(4)
+    kpi_card(col1, "Total Visits", f"{gameplay['visits']:,}", "🚶")
+    kpi_card(col2, "Unique Customers", page_kpi('unique_customers', scope, exact=scope['exact']), "🧑‍🤝‍🧑")
+    kpi_card(col3, "Avg. Visit Duration", f"{gameplay['average_duration']:.0f} mins", "⏱️")
+    kpi_card(col4, "Avg. Rating", f"{gameplay['average_rating']:.2f} / 5", "⭐")
+    untimed_visits_caption(gameplay['untimed_visits'])
+
+visit_kpis(filters)
+
+
+st.markdown("---")
+
+st.subheader("Customer Feedback & Demographics")
+
+col_ratings, col_ages = st.columns(2)
+
+@page_fragment("Rating Distribution", depends_on=('start', 'end', 'game'))
+def ratings(scope):
+    # Customer Rating Distribution bar chart
+    render_figure('ratings', scope)
+
+@page_fragment("Age Distribution", depends_on=('start', 'end', 'game'))
+def ages(scope):
+    render_figure('ages', scope)
+
+with col_ratings:
+    ratings(filters)
+
+with col_ages:
+    ages(filters)
+
+st.markdown("---")
+st.subheader("Station Utilisation")
+
+@page_fragment("Station Utilisation", depends_on=('start', 'end', 'game'))
+def utilisation(scope):
+    peak_stations, peak_date, peak_slot = page_kpi('peak_load', scope)
+    col_peak, col_heatmap = st.columns([1, 4])
+    peak_when = f"{peak_date:%a %d %b}, {slot_label(peak_slot)}" if peak_date is not None else "N/A"
+    kpi_card(col_peak, "Peak Load", f"{peak_stations:,} stations", "🕹️")
+    kpi_card(col_peak, "Peak Time", peak_when, "📅")
+    with col_heatmap:
+        render_figure('utilisation', scope)
+
+utilisation(filters)
+
+st.markdown("---")
+st.subheader("Customer Analytics")
+
+@page_fragment("Customer Analytics")
+def analytics_section(scope):
+    # Covers all recorded activity, so it depends on the data version only
+    analytics = customer_analytics(scope['version'])
+    if analytics is None:
+        st.info("No customer activity recorded yet.")
+        return
+    st.caption(f"All gameplay, snack and tournament spend by CustomerID up to {analytics['as_of']:%d %b %Y}; "
+               "not affected by the sidebar filters.")
+    col_segments, col_retention = st.columns(2)
+    with col_segments:
+        st.markdown("**RFM Segments** (recency, frequency and monetary scores, 1-5)")
+        st.dataframe(analytics['segments'], hide_index=True, column_config={
+            'Lifetime Value': st.column_config.NumberColumn(format="P%.2f"),
+            'Avg. Lifetime Value': st.column_config.NumberColumn(format="P%.2f"),
+            'Avg. Recency (days)': st.column_config.NumberColumn(format="%.1f"),
+        })
+    with col_retention:
+        render_customer_figure('retention', scope['version'])
+
+    col_ltv, col_customers = st.columns(2)
+    with col_ltv:
+        render_customer_figure('cohort_ltv', scope['version'])
+    with col_customers:
+        st.markdown("**Top Customers by Lifetime Value**")
+        # Only the head is sent to the browser; the full table can hold tens of thousands of customers
+        st.dataframe(analytics['customers'].head(50), hide_index=True, column_order=[
+            'CustomerID', 'Customer Name', 'Segment', 'RFM', 'Lifetime Value', 'Gameplay', 'Snacks',
+            'Tournaments', 'Visits', 'Recency (days)',
+        ])
+
+analytics_section(filters)
@@ -0,0 +1,55 @@
+import io
+
+import streamlit as st
+import pandas as pd
+
+from common import current_filters, data_quality, kpi_card, page_fragment
+
+# --- Data Quality: validation results, quarantined rows and date coverage (not affected by the filters) ---
+filters = current_filters()
+
+st.subheader("Data Quality")
+
+@page_fragment("Validation Summary")
+def validation_summary(scope):
+    report, reasons, _ = data_quality(scope['version'])
+    checked, quarantined = report['Checked'].sum(), report['Quarantined'].sum()
+    col1, col2, col3 = st.columns(3)
+    kpi_card(col1, "Rows Checked", f"{checked:,}", "🔎")
+    kpi_card(col2, "Rows Quarantined", f"{quarantined:,}", "🚫")
+    kpi_card(col3, "Quarantined Share", f"{quarantined / checked:.2%}" if checked else "N/A", "📋")
+
+    st.markdown("---")
+
+    st.markdown("**Rows and Date Coverage per Source**")
+    st.dataframe(report, hide_index=True, column_config={
+        'Quarantined %': st.column_config.NumberColumn(format="%.2f%%"),
+        'First Date': st.column_config.DateColumn(format="D MMM YYYY"),
+        'Last Date': st.column_config.DateColumn(format="D MMM YYYY"),
+    })
+    st.caption("Days Without Rows counts the days between the first and last date with nothing recorded; "
+               "sparse logs such as expenses are expected to have many.")
+
+    st.markdown("**Quarantine Reasons**")
+    if reasons.empty:
+        st.success("Every row passed validation.")
+    else:
+        st.dataframe(reasons, hide_index=True)
+
+@page_fragment("Quarantined Rows")
+def quarantined_rows(scope):
+    _, _, quarantine = data_quality(scope['version'])
+    if quarantine.empty:
+        return
+    st.markdown("**Quarantined Rows**")
+    sources = quarantine['Source'].unique().tolist()
+    source = st.selectbox("Source", sources)
+    rows = quarantine[quarantine['Source'] == source]
+    # Rows are kept as the CSV values they were read from, one JSON object each
+    values = pd.read_json(io.StringIO("\n".join(rows['Row'])), lines=True, dtype=False, convert_dates=False)
+    st.dataframe(pd.concat([rows[['Reason']].reset_index(drop=True), values], axis=1), hide_index=True)
+    st.download_button("Download quarantine (CSV)", quarantine.to_csv(index=False), file_name="quarantine.csv",
+                       mime="text/csv")
+
+validation_summary(filters)
+quarantined_rows(filters)
@@ -0,0 +1,26 @@
+import streamlit as st
+
+from common import current_filters, kpi_card, page_fragment, page_kpi, render_figure
+
+# --- Expenses: spend by category (not affected by the game filter) ---
+filters = current_filters()
+
+st.subheader("Expenses")
+
+@page_fragment("Expenses", depends_on=('start', 'end'))
+def expenses_section(scope):
+    totals = page_kpi('expense_totals', scope).sort_values('Amount (P)', ascending=False)
+    col1, col2 = st.columns(2)
+    kpi_card(col1, "Total Expenses", f"P{totals['Amount (P)'].sum():,.2f}", "📉")
+    kpi_card(col2, "Largest Category", totals['Expense Category'].iloc[0] if not totals.empty else "N/A", "🧾")
+
+    st.markdown("---")
+
+    col_breakdown, col_timeline = st.columns(2)
+    with col_breakdown:
+        # Expenses Breakdown pie chart
+        render_figure('expenses', scope)
+    with col_timeline:
+        render_figure('expense_timeline', scope)
+
+expenses_section(filters)
@@ -0,0 +1,61 @@
+import streamlit as st
+
+from common import (current_filters, data_backend, kpi_card, memory_report, page_fragment, page_kpi, render_figure,
+                    untimed_visits_caption)
+
+# --- Overview: headline KPIs across every stream ---
+filters = current_filters()
+
+st.subheader("Key Performance Indicators")
+
+@page_fragment("Gameplay KPIs", depends_on=('start', 'end', 'game', 'exact'))
+def gameplay_kpis(scope):
+    # Everything in this row moves with the game filter
+    revenue = page_kpi('revenue', scope)
+    gameplay = page_kpi('gameplay', scope)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    kpi_card(col1, "Net Profit", f"P{revenue['net_profit']:,.2f}", "💸")
+    kpi_card(col2, "Gameplay Revenue", f"P{revenue['visits']:,.2f}", "🎮")
+    kpi_card(col3, "Total Visits", f"{gameplay['visits']:,}", "🚶")
+    kpi_card(col4, "Unique Customers", page_kpi('unique_customers', scope, exact=scope['exact']), "🧑‍🤝‍🧑")
+    kpi_card(col5, "Avg. Visit Duration", f"{gameplay['average_duration']:.0f} mins", "⏱️")
+    untimed_visits_caption(gameplay['untimed_visits'])
+
+@page_fragment("Other Stream KPIs", depends_on=('start', 'end'))
+def stream_kpis(scope):
+    revenue = page_kpi('revenue', scope)
+    col6, col7, col8, col9, col10 = st.columns(5)
+    kpi_card(col6, "Snack Revenue", f"P{revenue['snacks']:,.2f}", "🍔")
+    kpi_card(col7, "Tournament Revenue", f"P{revenue['tournaments']:,.2f}", "🏆")
+    kpi_card(col8, "Snooker Revenue", f"P{revenue['snooker']:,.2f}", "🎱")
+    kpi_card(col9, "Table Football Revenue", f"P{revenue['table_football']:,.2f}", "⚽")
+    kpi_card(col10, "Total Expenses", f"P{revenue['expenses']:,.2f}", "📉")
+
+gameplay_kpis(filters)
+stream_kpis(filters)
+
+
+st.markdown("---")
+
+st.subheader("Core Business Insights")
+
+col_games, col_customers = st.columns(2)
+
+@page_fragment("Most Played Games", depends_on=('start', 'end', 'game'))
+def popular_games(scope):
+    render_figure('popular_games', scope)
+
+@page_fragment("Top Customers", depends_on=('start', 'end', 'game', 'exact'))
+def top_customers(scope):
+    render_figure('top_customers', scope, exact=scope['exact'])
+
+with col_games:
+    popular_games(filters)
+
+with col_customers:
+    top_customers(filters)
+
+report = memory_report(filters['version'], data_backend().loaded_data())
+if report is not None:
+    with st.expander("Memory per Dataset"):
+        st.dataframe(report, hide_index=True)
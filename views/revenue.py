@@ -0,0 +1,45 @@
+import streamlit as st
+
+from common import current_filters, kpi_card, page_fragment, page_kpi, render_figure
+from gamevault.rollups import REVENUE_RESOLUTIONS, REVENUE_STREAMS
+
+# --- Revenue: every stream from the daily cube alone ---
+filters = current_filters()
+
+st.subheader("Revenue")
+
+@page_fragment("Revenue KPIs", depends_on=('start', 'end', 'game'))
+def revenue_kpis(scope):
+    revenue = page_kpi('revenue', scope)
+    col1, col2, col3, col4 = st.columns(4)
+    col5, col6, col7, col8 = st.columns(4)
+
+    kpi_card(col1, "Total Revenue", f"P{revenue['revenue']:,.2f}", "💰")
+    kpi_card(col2, "Net Profit", f"P{revenue['net_profit']:,.2f}", "💸")
+    kpi_card(col3, "Profit Margin", f"{revenue['profit_margin']:.1f}%", "📈")
+    kpi_card(col4, "Total Expenses", f"P{revenue['expenses']:,.2f}", "📉")
+
+    kpi_card(col5, "Gameplay Revenue", f"P{revenue['visits']:,.2f}", "🎮")
+    kpi_card(col6, "Snack Revenue", f"P{revenue['snacks']:,.2f}", "🍔")
+    kpi_card(col7, "Snooker + Table Football", f"P{revenue['snooker'] + revenue['table_football']:,.2f}", "🎱")
+    kpi_card(col8, "Tournament Revenue", f"P{revenue['tournaments']:,.2f}", "🏆")
+
+revenue_kpis(filters)
+
+
+st.markdown("---")
+
+@page_fragment("Revenue Trend", depends_on=('start', 'end', 'game'))
+def revenue_trend(scope):
+    # Revenue over Time chart: any mix of streams, at daily/weekly/monthly resolution. These controls
+    # live inside the fragment, so changing them reruns only this chart.
+    control_col1, control_col2 = st.columns(2)
+    revenue_resolution = control_col1.radio("Resolution", list(REVENUE_RESOLUTIONS), horizontal=True)
+    revenue_chart_style = control_col2.radio("Chart Style", ['Lines', 'Stacked'], horizontal=True)
+    stream_options = list(REVENUE_STREAMS.values()) if revenue_chart_style == 'Stacked' else list(REVENUE_STREAMS.values()) + ['Total Revenue']
+    selected_streams = st.multiselect("Revenue Streams", stream_options, default=stream_options)
+
+    render_figure('revenue_trend', scope, resolution=revenue_resolution,
+                  style=revenue_chart_style, streams=tuple(selected_streams))
+
+revenue_trend(filters)
@@ -0,0 +1,34 @@
+import streamlit as st
+
+from common import current_filters, kpi_card, page_fragment, page_kpi, render_figure
+
+# --- Snacks & Inventory: snack sales only (not affected by the game filter) ---
+filters = current_filters()
+
+st.subheader("Snacks & Inventory")
+
+@page_fragment("Snack Sales", depends_on=('start', 'end'))
+def snack_sales_section(scope):
+    snack_sales = page_kpi('snack_sales', scope)
+    col1, col2, col3 = st.columns(3)
+    kpi_card(col1, "Snack Revenue", f"P{snack_sales['Amount'].sum():,.2f}", "🍔")
+    kpi_card(col2, "Items Sold", f"{snack_sales['Quantity'].sum():,.0f}", "📦")
+    kpi_card(col3, "Most Popular Snack", snack_sales['Snack'].iloc[0] if not snack_sales.empty else "N/A", "🥇")
+
+    st.markdown("---")
+
+    col_popularity, col_revenue = st.columns(2)
+    with col_popularity:
+        # Snack Popularity bar chart
+        render_figure('snack_popularity', scope)
+    with col_revenue:
+        render_figure('snack_revenue', scope)
+
+    st.markdown("**Units Sold per Snack**")
+    st.dataframe(snack_sales, hide_index=True, column_config={
+        'Quantity': st.column_config.NumberColumn("Units Sold", format="%d"),
+        'Amount': st.column_config.NumberColumn("Revenue (P)", format="P%.2f"),
+        'Avg. Price (P)': st.column_config.NumberColumn(format="P%.2f"),
+    })
+
+snack_sales_section(filters)
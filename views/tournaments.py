@@ -0,0 +1,32 @@
+import streamlit as st
+
+from common import current_filters, kpi_card, page_fragment, page_kpi, render_figure
+
+# --- Tournaments: entries, fees and placings (not affected by the game filter) ---
+filters = current_filters()
+
+st.subheader("Tournaments")
+
+@page_fragment("Tournaments", depends_on=('start', 'end'))
+def tournaments_section(scope):
+    entries = page_kpi('tournament_entries', scope)
+    col1, col2, col3 = st.columns(3)
+    kpi_card(col1, "Tournament Revenue", f"P{entries['Amount'].sum():,.2f}", "🏆")
+    kpi_card(col2, "Entries", f"{entries['Entries'].sum():,}", "🎟️")
+    kpi_card(col3, "Games Contested", f"{len(entries):,}", "🎮")
+
+    st.markdown("---")
+
+    col_games, col_podium = st.columns(2)
+    with col_games:
+        render_figure('tournament_games', scope)
+    with col_podium:
+        st.markdown("**Placings**")
+        podium = page_kpi('podium', scope).sort_values(['Date', 'Game Played', 'Position'], ascending=[False, True, True])
+        if podium.empty:
+            st.info("No placings recorded in this range.")
+        else:
+            st.dataframe(podium[['Date', 'Game Played', 'Position', 'Participant Name', 'CustomerID']], hide_index=True,
+                         column_config={'Date': st.column_config.DateColumn(format="D MMM YYYY")})
+
+tournaments_section(filters)